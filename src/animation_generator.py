@@ -4,22 +4,76 @@ Animation Generator Module
 This module handles the complete pipeline for generating Manim animations from natural language prompts:
 1. AnimationPlanner - Creates structured animation plan from user prompt
 2. ManimCodeGenerator - Generates Python/Manim code from the plan
-3. AnimationRenderer - Renders the animation video using Manim CLI
+3. AnimationRenderer - Renders the animation video with Manim
 """
 
 import os
-import re
+import ast
 import json
+import asyncio
+import hashlib
+import queue
+import typing
+import tempfile
+import functools
+import threading
 import subprocess
-import time
 from pathlib import Path
-from datetime import datetime
-import google.generativeai as genai
-from dotenv import load_dotenv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from llm_cache import LLMCache, get_semantic_cache
+from prompt_catalog import get_prompt_catalog
+from scene_templates import get_scene_template_bank
+from render_worker import RenderWorker, get_render_worker, get_render_workers
 
-# Load environment variables
-load_dotenv()
+MODEL_NAME = "gemini-3-flash-preview"
 
+# gRPC keeps one HTTP/2 connection open and multiplexes every Gemini call over it;
+# set GEMINI_TRANSPORT=rest where gRPC traffic is blocked
+DEFAULT_GEMINI_TRANSPORT = "grpc"
+
+# Upper bound on in-flight Gemini requests when running prompts in a batch
+MAX_CONCURRENT_GEMINI_CALLS = 8
+
+# Number of prompts planned (and coded) together in one Gemini request
+PROMPT_BATCH_SIZE = 8
+
+# Shared Gemini model, configured on first use
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+# Explicit Gemini context caches for the static part of each system prompt
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+CONTEXT_CACHE_REFRESH_MARGIN = timedelta(minutes=5)
+_CONTEXT_CACHES: dict[str, object] = {}
+_CONTEXT_CACHES_LOCK = threading.Lock()
+
+# Each generated scene is written to its own file, named after its class
+GENERATED_SCENES_DIR = Path("src/generated")
+
+# Class name Gemini is asked to use; scenes are renamed after generation, so the
+# prompt stays identical across requests and its prefix can be cached
+PROMPT_SCENE_CLASS_NAME = "GeneratedScene"
+
+# Manim output root; pinned so videos and partial movie files land in one place
+# whatever a local manim.cfg says
+MEDIA_DIR = Path("media")
+
+# A render is abandoned after this many seconds without output from Manim
+RENDER_IDLE_TIMEOUT = 60
+
+# Scenes estimated to run longer than this are rendered at draft quality
+LONG_SCENE_SECONDS = 45
+
+# Parallel renders; each Manim process also drives an ffmpeg encoder, so leave
+# half of the cores for those
+RENDER_MAX_PARALLEL = max(1, (os.cpu_count() or 2) // 2)
+RENDER_LOG_MAX_LINES = 2000
+
+# Draft renders trade resolution and frame rate for a faster first preview
+DRAFT_RESOLUTION = (320, 240)
+DRAFT_FRAME_RATE = 10
 
 PROMPTS_DIR = Path("prompts")
 PROMPT_CONFIG_PATH = PROMPTS_DIR / "prompt_config.json"
@@ -28,6 +82,46 @@ DEFAULT_PROMPT_CONFIG = {
     "code_gen_prompt_file": "code_gen_system_prompt.txt",
 }
 
+# config_key -> (config mtime, prompt path, prompt mtime, template text,
+#                whether the template contains {user_prompt})
+_TEMPLATE_CACHE: dict[str, tuple[float | None, Path, float | None, str, bool]] = {}
+
+
+@functools.cache
+def _load_env() -> None:
+    """Load environment variables from .env, once, on first use rather than at import."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _get_model():
+    """
+    Return the process-wide Gemini model, configuring the client on first use.
+    
+    Planner and code generator share one model, so its client and connection are
+    reused across pipeline steps and requests. The Gemini SDK is imported here, on
+    first use, so paths that never call Gemini (catalog hits, rendering) skip its
+    import cost.
+    """
+    global _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            _load_env()
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError(
+                    "GEMINI_API_KEY not found. Please set it in your .env file. "
+                    "Get your API key from: https://makersuite.google.com/app/apikey"
+                )
+            
+            import google.generativeai as genai
+            genai.configure(
+                api_key=api_key,
+                transport=os.getenv("GEMINI_TRANSPORT", DEFAULT_GEMINI_TRANSPORT)
+            )
+            _MODEL = genai.GenerativeModel(MODEL_NAME)
+        return _MODEL
+
 
 def _render_prompt_template(template: str, values: dict[str, str]) -> str:
     """Replace known placeholders without failing on unknown placeholders."""
@@ -37,9 +131,294 @@ def _render_prompt_template(template: str, values: dict[str, str]) -> str:
     return rendered
 
 
-def _load_prompt_config() -> dict:
-    """Load prompt file selection from config, with defaults as fallback."""
-    if not PROMPT_CONFIG_PATH.exists():
+def _split_static_prefix(template: str, placeholders) -> str:
+    """Return the part of a template that comes before the first known placeholder."""
+    positions = [template.find(f"{{{key}}}") for key in placeholders]
+    positions = [pos for pos in positions if pos != -1]
+    return template[:min(positions)] if positions else template
+
+
+def _get_context_cached_model(static_prefix: str):
+    """
+    Return a model bound to an explicit Gemini context cache holding static_prefix.
+    
+    Caches are created once per distinct prefix and their TTL is extended when they
+    are close to expiring; a cache that has already expired, or whose extension
+    fails, is replaced with a new one. Returns None when no cache is available for
+    this call. Only a rejected creation (for example a prefix shorter than Gemini's
+    minimum cacheable size) is remembered, so the API is not asked again for that
+    prefix; transient errors are retried on the next call.
+    """
+    if not static_prefix.strip():
+        return None
+    
+    import google.generativeai as genai
+    from google.api_core import exceptions as api_exceptions
+    
+    key = hashlib.sha256(static_prefix.encode("utf-8")).hexdigest()
+    
+    with _CONTEXT_CACHES_LOCK:
+        if key in _CONTEXT_CACHES and _CONTEXT_CACHES[key] is None:
+            return None
+        cached_content = _CONTEXT_CACHES.get(key)
+    
+    # Network calls happen outside the lock so they do not hold up other Gemini calls
+    if cached_content is not None:
+        remaining = cached_content.expire_time - datetime.now(timezone.utc)
+        if remaining <= timedelta(0):
+            cached_content = None
+        elif remaining < CONTEXT_CACHE_REFRESH_MARGIN:
+            try:
+                cached_content.update(ttl=CONTEXT_CACHE_TTL)
+            except Exception:
+                # Gone or unreachable; fall through to creating a fresh cache
+                cached_content = None
+    
+    if cached_content is None:
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=f"models/{MODEL_NAME}",
+                system_instruction=static_prefix,
+                ttl=CONTEXT_CACHE_TTL
+            )
+        except api_exceptions.InvalidArgument:
+            # The prefix itself was rejected (e.g. too small to cache); do not ask again
+            with _CONTEXT_CACHES_LOCK:
+                _CONTEXT_CACHES[key] = None
+            return None
+        except Exception:
+            return None
+    
+    with _CONTEXT_CACHES_LOCK:
+        _CONTEXT_CACHES[key] = cached_content
+    
+    return genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+
+
+class PlanItem(typing.TypedDict):
+    prompt_index: int
+    plan: str
+
+
+class CodeItem(typing.TypedDict):
+    prompt_index: int
+    code: str
+
+
+def _extract_token_usage(response) -> dict:
+    """
+    Read token counts from a Gemini response.
+    
+    input_tokens includes cached_tokens, the part of the prompt served from a
+    context cache (billed at a discount).
+    """
+    return {
+        'input_tokens': response.usage_metadata.prompt_token_count,
+        'output_tokens': response.usage_metadata.candidates_token_count,
+        'cached_tokens': getattr(response.usage_metadata, "cached_content_token_count", 0) or 0
+    }
+
+
+def _no_token_usage() -> dict:
+    """Token usage of a step that made no Gemini call (cache or catalog hit)."""
+    return {'input_tokens': 0, 'output_tokens': 0, 'cached_tokens': 0}
+
+
+def _split_token_usage(token_usage: dict, texts: list[str]) -> list[dict]:
+    """
+    Share the token usage of one batched request between its items, by output length.
+    
+    Counts are split with largest-remainder rounding: each item gets the floor of
+    its exact share and the leftover tokens go to the largest fractional parts, so
+    every share is non-negative and the shares add up to the total.
+    """
+    weights = [len(text) for text in texts]
+    if not any(weights):
+        weights = [1] * len(texts)
+    total_weight = sum(weights)
+    shares = [{} for _ in texts]
+    
+    for key, value in token_usage.items():
+        floors = [value * weight // total_weight for weight in weights]
+        leftover = value - sum(floors)
+        by_remainder = sorted(
+            range(len(texts)),
+            key=lambda i: value * weights[i] % total_weight,
+            reverse=True
+        )
+        for i in by_remainder[:leftover]:
+            floors[i] += 1
+        for share, count in zip(shares, floors):
+            share[key] = count
+    
+    return shares
+
+
+def _parse_batch_response(response_text: str, field: str, count: int) -> list[str]:
+    """Order the items of a structured batch response by prompt_index."""
+    items = json.loads(response_text)
+    by_index = {item["prompt_index"]: item[field] for item in items}
+    
+    missing = [i for i in range(count) if i not in by_index]
+    if missing:
+        raise ValueError(f"Batched response is missing items for prompts {missing}")
+    
+    return [by_index[i] for i in range(count)]
+
+
+def _generate_content(
+    model,
+    template: str,
+    placeholders,
+    full_prompt: str,
+    on_chunk=None,
+    **kwargs
+):
+    """
+    Call Gemini for a prompt rendered from template and stream the response.
+    
+    The template text before its first placeholder never changes between requests,
+    so it is served from an explicit context cache and only the dynamic tail is sent.
+    Falls back to sending the full prompt when context caching is unavailable.
+    
+    on_chunk, if given, is called with the text of each chunk as it arrives. The
+    returned response is fully consumed, so .text and .usage_metadata are complete.
+    """
+    static_prefix = _split_static_prefix(template, placeholders)
+    cached_model = _get_context_cached_model(static_prefix)
+    
+    if cached_model is None:
+        response = model.generate_content(full_prompt, stream=True, **kwargs)
+    else:
+        response = cached_model.generate_content(
+            full_prompt[len(static_prefix):], stream=True, **kwargs
+        )
+    
+    for chunk in response:
+        if on_chunk is not None and chunk.parts:
+            on_chunk(chunk.text)
+    
+    return response
+
+
+def _scene_class_name(source: str) -> str:
+    """
+    Content-addressed scene class name.
+    
+    The same plan always maps to the same class (and scene file), so a repeated
+    plan finds its earlier video and Manim's partial movie cache.
+    """
+    return f"GeneratedScene_{hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _is_scene_class(node: ast.AST) -> bool:
+    """Whether node defines a Manim scene (a class based on Scene, ThreeDScene, manim.Scene, ...)."""
+    return isinstance(node, ast.ClassDef) and any(
+        (isinstance(base, ast.Name) and base.id.endswith("Scene"))
+        or (isinstance(base, ast.Attribute) and base.attr.endswith("Scene"))
+        for base in node.bases
+    )
+
+
+def _estimate_scene_seconds(code: str) -> float:
+    """
+    Rough length of a scene: the run_time of each self.play (1 s by default), the
+    duration of each self.wait (1 s by default) and 0.1 s of overhead per call.
+    Calls inside loops are counted once, so long loops are underestimated.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return 0.0
+    
+    def constant(node, default: float) -> float:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        return default
+    
+    seconds = 0.0
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+        ):
+            continue
+        
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+        if node.func.attr == "play":
+            seconds += constant(keywords.get("run_time"), 1.0) + 0.1
+        elif node.func.attr == "wait":
+            duration = node.args[0] if node.args else keywords.get("duration")
+            seconds += constant(duration, 1.0) + 0.1
+    
+    return seconds
+
+
+def _render_as_draft(code: str, draft: bool) -> bool:
+    """Whether a scene renders at draft quality: on request, or when it is a long one."""
+    return draft or _estimate_scene_seconds(code) > LONG_SCENE_SECONDS
+
+
+def _find_code_error(code: str, class_name: str) -> str | None:
+    """
+    Check generated code without running it.
+    
+    Returns:
+        Description of the problem, or None if the code parses and defines class_name
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"syntax error at line {e.lineno}: {e.msg}"
+    
+    if not any(isinstance(node, ast.ClassDef) and node.name == class_name for node in ast.walk(tree)):
+        return f"no class named {class_name}"
+    
+    return None
+
+
+def _first_chunk_logger(logger, message: str):
+    """
+    Build an on_chunk callback that logs message once, when the first chunk arrives.
+    
+    Gemini calls run in worker threads, so the message is handed back to the event
+    loop's thread; UI loggers such as Streamlit's must not be called from elsewhere.
+    """
+    loop = asyncio.get_running_loop()
+    received = threading.Event()
+    
+    def on_chunk(_text: str) -> None:
+        if not received.is_set():
+            received.set()
+            loop.call_soon_threadsafe(logger, message)
+    
+    return on_chunk
+
+
+def _mtime(path: Path) -> float | None:
+    """Modification time of path, or None if it does not exist."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _config_mtime() -> float | None:
+    """Modification time of the prompt config; part of the config cache key."""
+    return _mtime(PROMPT_CONFIG_PATH)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_prompt_config(config_mtime: float | None) -> dict:
+    """
+    Load prompt file selection from config, with defaults as fallback.
+    
+    The config file's mtime is the cache key, so the parsed result is reused
+    until the file changes.
+    """
+    if config_mtime is None:
         return DEFAULT_PROMPT_CONFIG.copy()
 
     try:
@@ -54,9 +433,24 @@ def _load_prompt_config() -> dict:
     return merged_config
 
 
-def _get_prompt_template(config_key: str) -> str:
-    """Read selected prompt template from prompts directory based on config key."""
-    config = _load_prompt_config()
+def _get_prompt_template(config_key: str) -> tuple[str, bool]:
+    """
+    Read selected prompt template from prompts directory based on config key.
+    
+    Templates are kept in memory and re-read only when the config file or the
+    selected prompt file has been modified since the last read.
+    
+    Returns:
+        Tuple of (template, uses_user_prompt_placeholder)
+    """
+    config_mtime = _config_mtime()
+    cached = _TEMPLATE_CACHE.get(config_key)
+    if cached is not None:
+        cached_config_mtime, prompt_path, prompt_mtime, template, uses_placeholder = cached
+        if cached_config_mtime == config_mtime and _mtime(prompt_path) == prompt_mtime:
+            return template, uses_placeholder
+
+    config = _load_prompt_config(config_mtime)
     selected_file = config.get(config_key)
 
     if not isinstance(selected_file, str) or not selected_file.strip():
@@ -77,240 +471,747 @@ def _get_prompt_template(config_key: str) -> str:
             f"Configured prompt file not found for '{config_key}': {prompt_path}"
         )
 
-    return prompt_path.read_text(encoding="utf-8")
+    prompt_mtime = _mtime(prompt_path)
+    template = prompt_path.read_text(encoding="utf-8")
+    uses_placeholder = "{user_prompt}" in template
+    _TEMPLATE_CACHE[config_key] = (
+        config_mtime, prompt_path, prompt_mtime, template, uses_placeholder
+    )
+    return template, uses_placeholder
+
+
+def preload_prompt_templates() -> None:
+    """
+    Read the planner and code-gen templates in parallel, so the first request
+    finds both already cached.
+    
+    Problems with the prompt files are left for that request to report.
+    """
+    def load(config_key: str) -> None:
+        try:
+            _get_prompt_template(config_key)
+        except (ValueError, FileNotFoundError):
+            pass
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(load, ["planner_prompt_file", "code_gen_prompt_file"]))
 
 
 class AnimationPlanner:
     """Generates a structured animation plan from a natural language prompt using Gemini."""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "GEMINI_API_KEY not found. Please set it in your .env file. "
-                "Get your API key from: https://makersuite.google.com/app/apikey"
-            )
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-3-flash-preview')
+    def __init__(self, model=None):
+        # Defaults to the shared module-level model (see _get_model)
+        self._model = model
+        self.cache = LLMCache()
+        self.semantic_cache = get_semantic_cache()
+    
+    @property
+    def model(self):
+        """Gemini model, resolved on first use so cache and catalog hits never need one."""
+        if self._model is None:
+            self._model = _get_model()
+        return self._model
     
-    def generate_plan(self, user_prompt: str) -> tuple[str, dict]:
+    def generate_plan(self, user_prompt: str, on_chunk=None) -> tuple[str, dict]:
         """
         Generate a structured animation plan from user prompt.
         
         Args:
             user_prompt: Natural language description of desired animation
+            on_chunk: Optional callback receiving response text as it streams in
             
         Returns:
             Tuple of (plan_text, token_usage_dict)
             where token_usage_dict contains 'input_tokens' and 'output_tokens'
         """
-        planner_template = _get_prompt_template("planner_prompt_file")
-        full_prompt = _render_prompt_template(
+        planner_template, uses_placeholder = _get_prompt_template("planner_prompt_file")
+        full_prompt = self._build_prompt(planner_template, uses_placeholder, user_prompt)
+        
+        # Identical requests are served from the on-disk response cache
+        cached = self.cache.get(MODEL_NAME, full_prompt)
+        if cached is not None:
+            return cached[0], _no_token_usage()
+        
+        # Paraphrases of an earlier prompt reuse its plan
+        semantic_namespace = LLMCache.make_key(MODEL_NAME, planner_template)
+        prompt_vector = self.semantic_cache.embed(user_prompt)
+        cached = self.semantic_cache.get(semantic_namespace, prompt_vector)
+        if cached is not None:
+            return cached[0], _no_token_usage()
+        
+        response = _generate_content(
+            self.model,
             planner_template,
-            {"user_prompt": user_prompt}
+            ["user_prompt"],
+            full_prompt,
+            on_chunk=on_chunk
         )
-
-        if "{user_prompt}" not in planner_template:
-            full_prompt = f"{full_prompt}\n\nUser Request: {user_prompt}"
         
-        response = self.model.generate_content(full_prompt)
+        token_usage = _extract_token_usage(response)
         
-        # Extract token usage from response metadata
-        token_usage = {
-            'input_tokens': response.usage_metadata.prompt_token_count,
-            'output_tokens': response.usage_metadata.candidates_token_count
-        }
+        self.cache.set(MODEL_NAME, full_prompt, response.text, token_usage)
+        self.semantic_cache.set(semantic_namespace, prompt_vector, response.text, token_usage)
         
         return response.text, token_usage
+    
+    def generate_plans(self, user_prompts: list[str], on_chunk=None) -> list[tuple[str, dict]]:
+        """
+        Generate plans for several prompts with a single Gemini request.
+        
+        Prompts already in the response cache are answered from it; the rest are
+        sent together and Gemini returns a JSON list with one plan per prompt.
+        The token usage of that request is shared between its plans by length.
+        
+        Args:
+            user_prompts: Natural language descriptions, one per animation
+            on_chunk: Optional callback receiving response text as it streams in
+            
+        Returns:
+            List of (plan_text, token_usage_dict) tuples, in the order of user_prompts
+        """
+        planner_template, uses_placeholder = _get_prompt_template("planner_prompt_file")
+        full_prompts = [
+            self._build_prompt(planner_template, uses_placeholder, prompt)
+            for prompt in user_prompts
+        ]
+        results = [
+            (cached[0], _no_token_usage()) if cached is not None else None
+            for cached in (self.cache.get(MODEL_NAME, full_prompt) for full_prompt in full_prompts)
+        ]
+        
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if not pending:
+            return results
+        
+        batch_prompt = _render_prompt_template(
+            planner_template,
+            {"user_prompt": "(see the numbered requests below)"}
+        )
+        requests = "\n\n".join(f"[{n}] {user_prompts[i]}" for n, i in enumerate(pending))
+        batch_prompt = (
+            f"{batch_prompt}\n\n"
+            "Plan each of the following user requests independently. Respond with a "
+            "JSON list holding one object per request, where prompt_index is the "
+            "request number and plan is the complete plan for that request.\n\n"
+            f"{requests}"
+        )
+        
+        response = _generate_content(
+            self.model,
+            planner_template,
+            ["user_prompt"],
+            batch_prompt,
+            on_chunk=on_chunk,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": list[PlanItem]
+            }
+        )
+        
+        plans = _parse_batch_response(response.text, "plan", len(pending))
+        usages = _split_token_usage(_extract_token_usage(response), plans)
+        
+        for i, plan, token_usage in zip(pending, plans, usages):
+            self.cache.set(MODEL_NAME, full_prompts[i], plan, token_usage)
+            results[i] = (plan, token_usage)
+        
+        return results
+    
+    def _build_prompt(self, planner_template: str, uses_placeholder: bool, user_prompt: str) -> str:
+        """Render the planner template for one user prompt."""
+        if not uses_placeholder:
+            return f"{planner_template}\n\nUser Request: {user_prompt}"
+        
+        return _render_prompt_template(
+            planner_template,
+            {"user_prompt": user_prompt}
+        )
 
 
 class ManimCodeGenerator:
     """Generates Manim Python code from an animation plan using Gemini."""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "GEMINI_API_KEY not found. Please set it in your .env file."
-            )
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-3-flash-preview')
-        self.output_file = Path("src/generated_animations.py")
+    def __init__(self, model=None):
+        # Defaults to the shared module-level model (see _get_model)
+        self._model = model
+        self.cache = LLMCache()
+        self.semantic_cache = get_semantic_cache()
+        self.output_dir = GENERATED_SCENES_DIR
     
-    def generate_code(self, animation_plan: str, user_prompt: str) -> tuple[str, str, dict]:
+    @property
+    def model(self):
+        """Gemini model, resolved on first use so cache and catalog hits never need one."""
+        if self._model is None:
+            self._model = _get_model()
+        return self._model
+    
+    def generate_code(
+        self,
+        animation_plan: str,
+        user_prompt: str,
+        on_chunk=None
+    ) -> tuple[str, str, dict]:
         """
         Generate Manim code from animation plan.
         
         Args:
             animation_plan: Structured plan with animation steps
             user_prompt: Original user prompt (for context)
+            on_chunk: Optional callback receiving response text as it streams in
             
         Returns:
             Tuple of (generated_code, class_name, token_usage_dict)
             where token_usage_dict contains 'input_tokens' and 'output_tokens'
         """
-        # Create unique class name based on timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        class_name = f"GeneratedScene_{timestamp}"
+        class_name = _scene_class_name(animation_plan)
         
-        template = _get_prompt_template("code_gen_prompt_file")
-
-        system_prompt = _render_prompt_template(
+        template, _ = _get_prompt_template("code_gen_prompt_file")
+        system_prompt = self._build_prompt(template, animation_plan, user_prompt)
+        
+        semantic_namespace = LLMCache.make_key(MODEL_NAME, template)
+        request_vector = None
+        
+        cached = self.cache.get(MODEL_NAME, system_prompt)
+        if cached is None:
+            request_vector = self.semantic_cache.embed(f"{user_prompt}\n\n{animation_plan}")
+            cached = self.semantic_cache.get(semantic_namespace, request_vector)
+        
+        if cached is not None:
+            generated_code, token_usage = self._finalize_code(cached[0], class_name), _no_token_usage()
+        else:
+            response = _generate_content(
+                self.model,
+                template,
+                ["class_name", "animation_plan", "plan_output", "user_prompt"],
+                system_prompt,
+                on_chunk=on_chunk
+            )
+            generated_code = self._finalize_code(response.text, class_name)
+            token_usage = _extract_token_usage(response)
+            
+            # Broken code never reaches Manim: ask once for a corrected version
+            error = _find_code_error(generated_code, class_name)
+            if error is not None:
+                response = _generate_content(
+                    self.model,
+                    template,
+                    ["class_name", "animation_plan", "plan_output", "user_prompt"],
+                    f"{system_prompt}\n\n"
+                    f"The previous code had an error ({error}). "
+                    f"Regenerate the complete file, correcting it.\n\n"
+                    f"PREVIOUS CODE:\n{generated_code}"
+                )
+                generated_code = self._finalize_code(response.text, class_name)
+                retry_usage = _extract_token_usage(response)
+                token_usage = {key: token_usage[key] + retry_usage[key] for key in token_usage}
+                error = _find_code_error(generated_code, class_name)
+            
+            if error is not None:
+                raise ValueError(f"Generated code is invalid: {error}")
+            
+            self.cache.set(MODEL_NAME, system_prompt, generated_code, token_usage)
+            self.semantic_cache.set(semantic_namespace, request_vector, generated_code, token_usage)
+        
+        self._write_scene(generated_code, class_name)
+        
+        return generated_code, class_name, token_usage
+    
+    def generate_codes(
+        self,
+        animation_plans: list[str],
+        user_prompts: list[str],
+        on_chunk=None
+    ) -> list[tuple[str, str, dict]]:
+        """
+        Generate Manim code for several plans with a single Gemini request.
+        
+        Each scene is written to its own file (see scene_file).
+        
+        Args:
+            animation_plans: Structured plans, one per animation
+            user_prompts: Original user prompts, in the same order as animation_plans
+            on_chunk: Optional callback receiving response text as it streams in
+            
+        Returns:
+            List of (generated_code, class_name, token_usage_dict) tuples,
+            in the order of animation_plans
+        """
+        class_names = [_scene_class_name(plan) for plan in animation_plans]
+        
+        template, _ = _get_prompt_template("code_gen_prompt_file")
+        prompts = [
+            self._build_prompt(template, plan, prompt)
+            for plan, prompt in zip(animation_plans, user_prompts)
+        ]
+        results = [
+            (self._finalize_code(cached[0], class_name), _no_token_usage()) if cached is not None else None
+            for cached, class_name in zip(
+                (self.cache.get(MODEL_NAME, prompt) for prompt in prompts),
+                class_names
+            )
+        ]
+        
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if pending:
+            batch_prompt = _render_prompt_template(
+                template,
+                {
+                    "class_name": PROMPT_SCENE_CLASS_NAME,
+                    "animation_plan": "(see the numbered plans below)",
+                    "plan_output": "(see the numbered plans below)",
+                    "user_prompt": "(the user request given with each plan below)",
+                }
+            )
+            requests = "\n\n".join(
+                f"[{n}] USER REQUEST: {user_prompts[i]}\n"
+                f"PLAN:\n{animation_plans[i]}"
+                for n, i in enumerate(pending)
+            )
+            batch_prompt = (
+                f"{batch_prompt}\n\n"
+                "Write a separate, complete Python file for each of the following plans. "
+                "Respond with a JSON list holding one object per plan, where prompt_index "
+                "is the plan number and code is the Python source for that plan.\n\n"
+                f"{requests}"
+            )
+            
+            response = _generate_content(
+                self.model,
+                template,
+                ["class_name", "animation_plan", "plan_output", "user_prompt"],
+                batch_prompt,
+                on_chunk=on_chunk,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": list[CodeItem]
+                }
+            )
+            
+            codes = _parse_batch_response(response.text, "code", len(pending))
+            usages = _split_token_usage(_extract_token_usage(response), codes)
+            
+            for i, code, token_usage in zip(pending, codes, usages):
+                code = self._finalize_code(code, class_names[i])
+                # Invalid scenes are not cached; the renderer reports them without running Manim
+                if _find_code_error(code, class_names[i]) is None:
+                    self.cache.set(MODEL_NAME, prompts[i], code, token_usage)
+                results[i] = (code, token_usage)
+        
+        generated = []
+        for (code, token_usage), class_name in zip(results, class_names):
+            self._write_scene(code, class_name)
+            generated.append((code, class_name, token_usage))
+        
+        return generated
+    
+    def save_code(self, code: str) -> tuple[str, str]:
+        """
+        Save ready-made scene code (e.g. from the prompt catalog) like generated code.
+        
+        Returns:
+            Tuple of (code, class_name) with the scene class named after the code
+        """
+        class_name = _scene_class_name(code)
+        
+        code = self._finalize_code(code, class_name)
+        self._write_scene(code, class_name)
+        
+        return code, class_name
+    
+    def scene_file(self, class_name: str) -> Path:
+        """Path of the Python file holding the given generated scene."""
+        return self.output_dir / f"{class_name}.py"
+    
+    def _write_scene(self, code: str, class_name: str) -> None:
+        """
+        Write a generated scene to its own file.
+        
+        An unchanged file is left alone, so its mtime still predates the video
+        rendered from it (see AnimationRenderer.render). Changed files are written
+        to a temporary file and moved into place, so a render that loads the scene
+        concurrently never sees it half-written.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.scene_file(class_name)
+        if path.exists() and path.read_text(encoding='utf-8') == code:
+            return
+        
+        with tempfile.NamedTemporaryFile(
+            "w", encoding='utf-8', dir=self.output_dir, suffix=".tmp", delete=False
+        ) as tmp:
+            tmp.write(code)
+        os.replace(tmp.name, path)
+    
+    def _build_prompt(self, template: str, animation_plan: str, user_prompt: str) -> str:
+        """Render the code-gen template for one plan, with the fixed prompt class name."""
+        return _render_prompt_template(
             template,
             {
-                "class_name": class_name,
+                "class_name": PROMPT_SCENE_CLASS_NAME,
                 "animation_plan": animation_plan,
                 "plan_output": animation_plan,
                 "user_prompt": user_prompt,
             }
         )
-        
-        response = self.model.generate_content(system_prompt)
-        generated_code = response.text
-        
-        # Extract token usage from response metadata
-        token_usage = {
-            'input_tokens': response.usage_metadata.prompt_token_count,
-            'output_tokens': response.usage_metadata.candidates_token_count
-        }
-        
+    
+    def _finalize_code(self, code: str, class_name: str) -> str:
+        """Strip markdown fences and force the expected scene class name."""
         # Clean up the code (remove markdown code blocks if present)
-        generated_code = self._clean_code(generated_code)
+        code = self._clean_code(code)
         
         # Ensure the class name is correct
-        generated_code = self._ensure_class_name(generated_code, class_name)
-        
-        # Write to file
-        self.output_file.write_text(generated_code, encoding='utf-8')
-        
-        return generated_code, class_name, token_usage
+        return self._ensure_class_name(code, class_name)
     
     def _clean_code(self, code: str) -> str:
         """Remove markdown code blocks and extra whitespace."""
-        # Remove markdown code blocks
-        code = re.sub(r'```python\s*', '', code)
-        code = re.sub(r'```\s*', '', code)
+        if "```" not in code:
+            return code.strip()
         
-        # Remove leading/trailing whitespace
-        code = code.strip()
+        # Keep what lies between the first fence (minus its language tag) and the last one
+        _, _, tail = code.partition("```")
+        if tail.startswith("python"):
+            tail = tail[len("python"):]
+        body, fence, _ = tail.rpartition("```")
         
-        return code
+        # An unclosed fence (e.g. a truncated response) runs to the end of the text
+        return (body if fence else tail).strip()
     
     def _ensure_class_name(self, code: str, expected_class_name: str) -> str:
-        """Ensure the class name matches expected name."""
-        # Find class definition and replace with expected name
-        pattern = r'class\s+\w+\(Scene\)'
-        replacement = f'class {expected_class_name}(Scene)'
-        code = re.sub(pattern, replacement, code)
+        """
+        Ensure the scene class name matches expected name.
         
-        return code
+        The first top-level scene class is located with ast, whatever its bases, and
+        renamed in place on its own line, so comments and formatting are kept (which
+        ast.unparse would drop). Code that does not parse is returned unchanged and
+        reported by _find_code_error.
+        """
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return code
+        
+        scene = next((node for node in tree.body if _is_scene_class(node)), None)
+        if scene is None or scene.name == expected_class_name:
+            return code
+        
+        lines = code.split("\n")
+        line = lines[scene.lineno - 1]
+        name_start = line.index(scene.name, scene.col_offset + len("class"))
+        lines[scene.lineno - 1] = line[:name_start] + expected_class_name + line[name_start + len(scene.name):]
+        
+        return "\n".join(lines)
 
 
 class AnimationRenderer:
-    """Renders Manim animations using subprocess calls to the Manim CLI."""
+    """
+    Renders Manim animations.
+    
+    Cairo renders go to persistent worker processes with Manim already imported;
+    the Manim CLI is used for OpenGL renders and whenever a worker is unavailable.
+    """
     
     def __init__(self):
-        self.media_dir = Path("media/videos/generated_animations")
+        _load_env()
+        self.media_dir = MEDIA_DIR / "videos"
+        self.use_opengl = os.getenv("MANIM_RENDERER", "cairo").lower() == "opengl"
+        self.worker = get_render_worker()
+    
+    def warm_up(self, scene_count: int = 1) -> None:
+        """Start enough render workers for scene_count scenes, so their imports overlap with other work."""
+        if not self.use_opengl:
+            for worker in get_render_workers(min(scene_count, RENDER_MAX_PARALLEL)):
+                worker.start()
     
-    def render(self, class_name: str) -> tuple[bool, str, str]:
+    def render(
+        self,
+        class_name: str,
+        source_file: Path,
+        draft: bool = False
+    ) -> tuple[bool, str, str]:
         """
         Render a Manim animation.
         
+        Uses the Cairo renderer unless MANIM_RENDERER=opengl is set, in which case
+        the GPU-accelerated OpenGL renderer is tried first and Cairo is used as a
+        fallback if it fails (e.g. no usable OpenGL context).
+        
         Args:
             class_name: Name of the Manim Scene class to render
+            source_file: Python file that defines the scene
+            draft: Render a quick 240p/10fps preview instead of 480p15; scenes
+                estimated to run longer than LONG_SCENE_SECONDS always are
             
         Returns:
             Tuple of (success: bool, video_path_or_error: str, output_log: str)
         """
-        command = [
-            "manim",
-            "-ql",  # Low quality for speed
-            "src/generated_animations.py",
-            class_name
-        ]
+        return self._render_with(self.worker, class_name, source_file, draft)
+    
+    def _render_with(
+        self,
+        worker: RenderWorker,
+        class_name: str,
+        source_file: Path,
+        draft: bool
+    ) -> tuple[bool, str, str]:
+        """Render a scene on the given worker, falling back to the CLI (see render)."""
+        draft = _render_as_draft(source_file.read_text(encoding='utf-8'), draft)
+        settled = self._settle_without_manim(class_name, source_file, draft)
+        if settled is not None:
+            return settled
+        
+        if not self.use_opengl:
+            options = {
+                "quality": "low_quality",
+                "media_dir": str(MEDIA_DIR),
+                # Reuse partial movie files of unchanged animations across renders
+                "disable_caching": False,
+                "flush_cache": False,
+            }
+            if draft:
+                width, height = DRAFT_RESOLUTION
+                options.update(pixel_width=width, pixel_height=height, frame_rate=DRAFT_FRAME_RATE)
+            
+            rendered = worker.render(source_file, class_name, options, RENDER_IDLE_TIMEOUT)
+            if rendered is not None:
+                return rendered
+        
+        return self._render_cli(class_name, source_file, draft)
+    
+    def _settle_without_manim(
+        self,
+        class_name: str,
+        source_file: Path,
+        draft: bool
+    ) -> tuple[bool, str, str] | None:
+        """
+        Result of a render that does not need Manim, or None if Manim has to run.
+        
+        A video newer than its scene file was rendered from this exact code and is
+        returned as is. Code that does not parse is reported right away: parsing takes
+        about a millisecond, while starting Manim just to hit a SyntaxError takes seconds.
+        """
+        video_path = self.media_dir / source_file.stem / self._quality_dir(draft) / f"{class_name}.mp4"
+        if video_path.exists() and video_path.stat().st_mtime >= source_file.stat().st_mtime:
+            return True, str(video_path), ""
+        
+        error = _find_code_error(source_file.read_text(encoding='utf-8'), class_name)
+        if error is not None:
+            return False, f"Invalid scene code: {error}", ""
+        
+        return None
+    
+    def _render_cli(
+        self,
+        class_name: str,
+        source_file: Path,
+        draft: bool = False
+    ) -> tuple[bool, str, str]:
+        """Render a Manim animation with the Manim CLI (see render)."""
+        quality_args = ["-ql", "--media_dir", str(MEDIA_DIR)]  # Low quality for speed
+        quality_dir = self._quality_dir(draft)
+        if draft:
+            width, height = DRAFT_RESOLUTION
+            quality_args += [
+                "--resolution", f"{width},{height}",
+                "--frame_rate", str(DRAFT_FRAME_RATE)
+            ]
+        
+        if self.use_opengl:
+            success, video_or_error, output_log = self._run_manim(
+                ["--renderer=opengl", "--write_to_movie", *quality_args],
+                class_name,
+                source_file,
+                quality_dir
+            )
+            if success:
+                return success, video_or_error, output_log
+        
+        return self._run_manim(quality_args, class_name, source_file, quality_dir)
+    
+    def _quality_dir(self, draft: bool) -> str:
+        """Name of the folder Manim writes videos of the given quality to."""
+        if draft:
+            return f"{DRAFT_RESOLUTION[1]}p{DRAFT_FRAME_RATE}"
+        return "480p15"
+    
+    def _run_manim(
+        self,
+        options: list[str],
+        class_name: str,
+        source_file: Path,
+        quality_dir: str
+    ) -> tuple[bool, str, str]:
+        """Run the Manim CLI for one scene and locate the resulting video."""
+        command = ["manim", *options, str(source_file), class_name]
         
         try:
-            # Run manim command
-            result = subprocess.run(
+            # Run manim command, streaming its combined output
+            process = subprocess.Popen(
                 command,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=120  # 2 minute timeout
+                bufsize=1
             )
             
-            output_log = result.stdout + "\n" + result.stderr
+            output_lines = deque(maxlen=RENDER_LOG_MAX_LINES)
+            returncode = self._wait_for_output(process, output_lines)
+            output_log = "".join(output_lines)
+            
+            if returncode is None:
+                return (
+                    False,
+                    f"Rendering stalled (no output for {RENDER_IDLE_TIMEOUT} seconds)",
+                    output_log
+                )
             
-            if result.returncode != 0:
-                return False, f"Rendering failed: {result.stderr}", output_log
+            if returncode != 0:
+                return False, f"Rendering failed: {output_log}", output_log
             
             # Find the generated video file
-            video_path = self._find_latest_video(class_name)
+            video_path = self._find_latest_video(class_name, source_file, quality_dir)
             
             if video_path and video_path.exists():
                 return True, str(video_path), output_log
             else:
                 return False, "Video file not found after rendering", output_log
                 
-        except subprocess.TimeoutExpired:
-            return False, "Rendering timed out (>2 minutes)", ""
         except FileNotFoundError:
             return False, "Manim not found. Please install manim: pip install manim", ""
         except Exception as e:
             return False, f"Rendering error: {str(e)}", ""
     
-    def _find_latest_video(self, class_name: str) -> Path:
-        """Find the most recently created video file for the given scene."""
-        # Manim saves videos to media/videos/{script_name}/{quality}/{scene_name}.mp4
-        possible_paths = [
-            Path(f"media/videos/generated_animations/480p15/{class_name}.mp4"),
-            Path(f"media/videos/generated_animations/720p30/{class_name}.mp4"),
-            Path(f"media/videos/generated_animations/1080p60/{class_name}.mp4"),
-        ]
+    def _wait_for_output(self, process: subprocess.Popen, output_lines: deque) -> int | None:
+        """
+        Collect a render's output until it exits or stops producing output.
         
-        # Check each possible path
-        for path in possible_paths:
-            if path.exists():
-                return path
+        A reader thread feeds lines through a queue, so the idle timer restarts with
+        every line: long renders that keep reporting progress are never cut off,
+        while hung ones are killed after RENDER_IDLE_TIMEOUT seconds of silence.
         
-        # If not found in expected locations, search the entire media directory
-        if self.media_dir.exists():
-            video_files = list(self.media_dir.rglob("*.mp4"))
-            if video_files:
-                # Return the most recently modified video
-                return max(video_files, key=lambda p: p.stat().st_mtime)
+        Returns:
+            The process exit code, or None if it was killed for being idle
+        """
+        lines = queue.Queue()
         
-        return None
-
-
-def generate_animation(user_prompt: str, logger=None) -> dict:
-    """
-    Complete pipeline: prompt -> plan -> code -> render.
+        def read_output():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+        
+        threading.Thread(target=read_output, daemon=True).start()
+        
+        while True:
+            try:
+                line = lines.get(timeout=RENDER_IDLE_TIMEOUT)
+            except queue.Empty:
+                process.kill()
+                process.wait()
+                return None
+            
+            if line is None:
+                return process.wait()
+            
+            output_lines.append(line)
     
-    Args:
-        user_prompt: Natural language description of desired animation
-        logger: Optional callback function for logging (defaults to print)
+    def render_many(
+        self,
+        scenes: list[tuple[str, Path]],
+        draft: bool = False
+    ) -> list[tuple[bool, str, str]]:
+        """
+        Render several scenes in parallel on a pool of warm render workers.
         
-    Returns:
-        Dictionary with keys: success, plan, code, video_path, error, logs, token_usage
-    """
-    if logger is None:
-        logger = print
+        Each worker is its own process, so threads handing scenes to them are
+        enough to keep the CPU cores busy; at most RENDER_MAX_PARALLEL run at once.
+        
+        Args:
+            scenes: List of (class_name, source_file) pairs
+            draft: Render quick 240p/10fps previews instead of 480p15
+            
+        Returns:
+            List of render results (see render), in the order of scenes
+        """
+        if not scenes:
+            return []
+        
+        # Content-addressed scenes repeat within a batch (same prompt or cached code);
+        # render each (class_name, source_file) once, since two workers rendering the
+        # same pair would write to the same video and partial movie files
+        unique_scenes = list(dict.fromkeys(scenes))
+        
+        pool_size = min(len(unique_scenes), RENDER_MAX_PARALLEL)
+        idle_workers = queue.Queue()
+        for worker in get_render_workers(pool_size):
+            idle_workers.put(worker)
+        
+        def render_one(scene: tuple[str, Path]) -> tuple[bool, str, str]:
+            worker = idle_workers.get()
+            try:
+                return self._render_with(worker, *scene, draft)
+            finally:
+                idle_workers.put(worker)
+        
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            renders = dict(zip(unique_scenes, pool.map(render_one, unique_scenes)))
+        
+        return [renders[scene] for scene in scenes]
     
-    logger(f"[INPUT] User prompt: {user_prompt}")
+    def render_file(self, source_file: Path, draft: bool = False) -> dict[str, tuple[bool, str, str]]:
+        """
+        Render every scene class defined in a file, in parallel (see render_many).
+        
+        Returns:
+            Dictionary mapping each scene class name to its render result
+        """
+        tree = ast.parse(source_file.read_text(encoding='utf-8'))
+        class_names = [node.name for node in tree.body if _is_scene_class(node)]
+        
+        renders = self.render_many([(name, source_file) for name in class_names], draft)
+        return dict(zip(class_names, renders))
     
-    result = {
+    def _find_latest_video(self, class_name: str, source_file: Path, quality_dir: str) -> Path | None:
+        """Find the most recently created video file for the given scene."""
+        # Manim saves videos to media/videos/{script_name}/{quality}/{scene_name}.mp4
+        videos_dir = self.media_dir / source_file.stem
+        expected_path = videos_dir / quality_dir / f"{class_name}.mp4"
+        if expected_path.exists():
+            return expected_path
+        
+        # If not found under its own name (e.g. Manim picked a different output
+        # name), return the most recently modified video in the quality folder;
+        # the folder is fixed by the quality flags, so nothing else needs scanning
+        latest_mtime, latest_path = -1.0, None
+        try:
+            entries = os.scandir(videos_dir / quality_dir)
+        except FileNotFoundError:
+            return None
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".mp4") and entry.is_file():
+                    mtime = entry.stat().st_mtime
+                    if mtime > latest_mtime:
+                        latest_mtime, latest_path = mtime, Path(entry.path)
+        
+        return latest_path
+
+
+def _new_result() -> dict:
+    """Create an empty pipeline result dictionary."""
+    return {
         "success": False,
         "plan": "",
         "code": "",
         "class_name": "",
+        "source_file": "",
         "video_path": "",
         "error": "",
         "logs": "",
         "token_usage": {
             "total_input_tokens": 0,
             "total_output_tokens": 0,
+            "total_cached_tokens": 0,
             "plan_input_tokens": 0,
             "plan_output_tokens": 0,
             "code_input_tokens": 0,
@@ -320,55 +1221,155 @@ def generate_animation(user_prompt: str, logger=None) -> dict:
             "total_cost_usd": 0.0
         }
     }
+
+
+def _record_token_usage(result: dict, plan_tokens: dict, code_tokens: dict) -> None:
+    """Fill in per-step token counts, totals and costs on a pipeline result."""
+    result["token_usage"]["plan_input_tokens"] = plan_tokens['input_tokens']
+    result["token_usage"]["plan_output_tokens"] = plan_tokens['output_tokens']
+    result["token_usage"]["code_input_tokens"] = code_tokens['input_tokens']
+    result["token_usage"]["code_output_tokens"] = code_tokens['output_tokens']
+    
+    # Calculate totals and costs
+    total_input = plan_tokens['input_tokens'] + code_tokens['input_tokens']
+    total_output = plan_tokens['output_tokens'] + code_tokens['output_tokens']
+    # Responses cached before cached tokens were tracked have no count for them
+    total_cached = plan_tokens.get('cached_tokens', 0) + code_tokens.get('cached_tokens', 0)
+    
+    # Pricing: $0.5 per 1M input tokens ($0.05 when served from a context cache),
+    # $3 per 1M output tokens
+    input_cost = ((total_input - total_cached) / 1_000_000) * 0.5 + (total_cached / 1_000_000) * 0.05
+    output_cost = (total_output / 1_000_000) * 3.0
+    
+    result["token_usage"]["total_input_tokens"] = total_input
+    result["token_usage"]["total_output_tokens"] = total_output
+    result["token_usage"]["total_cached_tokens"] = total_cached
+    result["token_usage"]["input_cost_usd"] = input_cost
+    result["token_usage"]["output_cost_usd"] = output_cost
+    result["token_usage"]["total_cost_usd"] = input_cost + output_cost
+
+
+def _record_render(result: dict, success: bool, video_or_error: str, logs: str, logger) -> None:
+    """Store the outcome of the render step on a pipeline result."""
+    result["logs"] = logs
+    
+    if success:
+        result["success"] = True
+        result["video_path"] = video_or_error
+        logger(f"[SUCCESS] Animation generated successfully: {video_or_error}")
+    else:
+        result["error"] = video_or_error
+        logger(f"[ERROR] Rendering failed: {video_or_error}")
+
+
+def generate_animation(user_prompt: str, logger=None, draft: bool = False) -> dict:
+    """
+    Complete pipeline: prompt -> plan -> code -> render.
+    
+    Args:
+        user_prompt: Natural language description of desired animation
+        logger: Optional callback function for logging (defaults to print)
+        draft: Render a quick 240p/10fps preview instead of 480p15
+        
+    Returns:
+        Dictionary with keys: success, plan, code, class_name, source_file,
+        video_path, error, logs, token_usage
+    """
+    return asyncio.run(generate_animation_async(user_prompt, logger=logger, draft=draft))
+
+
+async def generate_animation_async(user_prompt: str, logger=None, draft: bool = False) -> dict:
+    """
+    Async version of generate_animation.
+    
+    The blocking Gemini and Manim calls run in worker threads, so pipelines can be
+    awaited alongside other work on one event loop.
+    
+    Args:
+        user_prompt: Natural language description of desired animation
+        logger: Optional callback function for logging (defaults to print)
+        draft: Render a quick 240p/10fps preview instead of 480p15
+        
+    Returns:
+        Dictionary with keys: success, plan, code, class_name, source_file,
+        video_path, error, logs, token_usage
+    """
+    if logger is None:
+        logger = print
+    
+    _load_env()
+    logger(f"[INPUT] User prompt: {user_prompt}")
+    
+    result = _new_result()
     
     try:
-        # Step 1: Generate plan
-        logger("[PLAN] Creating animation plan...")
-        planner = AnimationPlanner()
-        plan, plan_tokens = planner.generate_plan(user_prompt)
-        result["plan"] = plan
-        result["token_usage"]["plan_input_tokens"] = plan_tokens['input_tokens']
-        result["token_usage"]["plan_output_tokens"] = plan_tokens['output_tokens']
-        logger(f"[PLAN] Plan completed ({plan_tokens['output_tokens']} tokens)")
-        
-        # Step 2: Generate code
-        logger("[CODE] Generating Manim code...")
-        code_gen = ManimCodeGenerator()
-        code, class_name, code_tokens = code_gen.generate_code(plan, user_prompt)
-        result["code"] = code
-        result["class_name"] = class_name
-        result["token_usage"]["code_input_tokens"] = code_tokens['input_tokens']
-        result["token_usage"]["code_output_tokens"] = code_tokens['output_tokens']
-        logger(f"[CODE] Code generated ({code_tokens['output_tokens']} tokens)")
+        # Start the render worker now so Manim's imports overlap the Gemini calls
+        renderer = AnimationRenderer()
+        renderer.warm_up()
         
-        # Calculate totals and costs
-        total_input = plan_tokens['input_tokens'] + code_tokens['input_tokens']
-        total_output = plan_tokens['output_tokens'] + code_tokens['output_tokens']
+        code_gen = ManimCodeGenerator()
+        catalog_entry = await asyncio.to_thread(get_prompt_catalog().match, user_prompt)
+        scene_template = None
+        if catalog_entry is None:
+            scene_template = await asyncio.to_thread(get_scene_template_bank().fill, user_prompt)
         
-        # Pricing: $0.5 per 1M input tokens, $3 per 1M output tokens
-        input_cost = (total_input / 1_000_000) * 0.5
-        output_cost = (total_output / 1_000_000) * 3.0
+        if catalog_entry is not None:
+            # Canonical prompts reuse the catalog's plan and code, with no Gemini calls
+            logger(f"[CATALOG] Using catalog entry: {catalog_entry['prompt']}")
+            plan, plan_tokens = catalog_entry["plan"], _no_token_usage()
+            code, class_name = code_gen.save_code(catalog_entry["code"])
+            code_tokens = _no_token_usage()
+            result["plan"] = plan
+        elif scene_template is not None:
+            # Prompts of a known shape fill in a parameterized scene, also without Gemini
+            logger(f"[TEMPLATE] Using scene template: {scene_template['name']}")
+            plan, plan_tokens = scene_template["plan"], _no_token_usage()
+            code, class_name = code_gen.save_code(scene_template["code"])
+            code_tokens = _no_token_usage()
+            result["plan"] = plan
+        else:
+            # Step 1: Generate plan
+            logger("[PLAN] Creating animation plan...")
+            planner = AnimationPlanner()
+            plan, plan_tokens = await asyncio.to_thread(
+                planner.generate_plan,
+                user_prompt,
+                _first_chunk_logger(logger, "[PLAN] Receiving plan...")
+            )
+            result["plan"] = plan
+            if plan_tokens['input_tokens'] == 0:
+                logger("[CACHE HIT] Plan served from the response cache")
+            else:
+                logger(f"[PLAN] Plan completed ({plan_tokens['output_tokens']} tokens)")
+            
+            # Step 2: Generate code
+            logger("[CODE] Generating Manim code...")
+            code, class_name, code_tokens = await asyncio.to_thread(
+                code_gen.generate_code,
+                plan,
+                user_prompt,
+                _first_chunk_logger(logger, "[CODE] Receiving code...")
+            )
+            if code_tokens['input_tokens'] == 0:
+                logger("[CACHE HIT] Code served from the response cache")
+            else:
+                logger(f"[CODE] Code generated ({code_tokens['output_tokens']} tokens)")
         
-        result["token_usage"]["total_input_tokens"] = total_input
-        result["token_usage"]["total_output_tokens"] = total_output
-        result["token_usage"]["input_cost_usd"] = input_cost
-        result["token_usage"]["output_cost_usd"] = output_cost
-        result["token_usage"]["total_cost_usd"] = input_cost + output_cost
+        source_file = code_gen.scene_file(class_name)
+        result["code"] = code
+        result["class_name"] = class_name
+        result["source_file"] = str(source_file)
+        _record_token_usage(result, plan_tokens, code_tokens)
         
         # Step 3: Render animation
+        if _render_as_draft(code, draft) and not draft:
+            logger(f"[RENDER] Long scene (about {_estimate_scene_seconds(code):.0f} s), rendering a draft preview")
         logger("[RENDER] Rendering animation video...")
-        renderer = AnimationRenderer()
-        success, video_or_error, logs = renderer.render(class_name)
-        result["logs"] = logs
+        success, video_or_error, logs = await asyncio.to_thread(
+            renderer.render, class_name, source_file, draft
+        )
         logger("[RENDER] Rendering completed")
-        
-        if success:
-            result["success"] = True
-            result["video_path"] = video_or_error
-            logger(f"[SUCCESS] Animation generated successfully: {video_or_error}")
-        else:
-            result["error"] = video_or_error
-            logger(f"[ERROR] Rendering failed: {video_or_error}")
+        _record_render(result, success, video_or_error, logs, logger)
             
     except Exception as e:
         error_msg = f"Error in animation generation pipeline: {str(e)}"
@@ -376,3 +1377,111 @@ def generate_animation(user_prompt: str, logger=None) -> dict:
         logger(f"[ERROR] {error_msg}")
     
     return result
+
+
+async def generate_many(prompts: list[str], logger=None, draft: bool = False) -> list[dict]:
+    """
+    Run the complete pipeline for several prompts.
+    
+    Prompts are grouped into batches of PROMPT_BATCH_SIZE; each batch is planned
+    with one Gemini request and coded with one more. Batches run concurrently with
+    at most MAX_CONCURRENT_GEMINI_CALLS Gemini requests in flight.
+    
+    Args:
+        prompts: Natural language descriptions, one per animation
+        logger: Optional callback function for logging (defaults to print)
+        draft: Render quick 240p/10fps previews instead of 480p15
+        
+    Returns:
+        List of result dictionaries (see generate_animation), in the order of prompts
+    """
+    if logger is None:
+        logger = print
+    
+    _load_env()
+    gemini_slots = asyncio.Semaphore(MAX_CONCURRENT_GEMINI_CALLS)
+    batches = [
+        prompts[start:start + PROMPT_BATCH_SIZE]
+        for start in range(0, len(prompts), PROMPT_BATCH_SIZE)
+    ]
+    
+    batch_results = await asyncio.gather(*(
+        _generate_batch(batch, logger, gemini_slots, draft)
+        for batch in batches
+    ))
+    
+    return [result for results in batch_results for result in results]
+
+
+async def _generate_batch(
+    prompts: list[str],
+    logger,
+    gemini_slots: asyncio.Semaphore,
+    draft: bool
+) -> list[dict]:
+    """Plan, code and render one batch of prompts (see generate_many)."""
+    results = [_new_result() for _ in prompts]
+    
+    try:
+        # Start the render workers now so Manim's imports overlap the Gemini calls
+        renderer = AnimationRenderer()
+        renderer.warm_up(len(prompts))
+        
+        # Step 1: Generate all plans in one request
+        logger(f"[PLAN] Creating {len(prompts)} animation plans...")
+        planner = AnimationPlanner()
+        async with gemini_slots:
+            plans = await asyncio.to_thread(
+                planner.generate_plans,
+                prompts,
+                _first_chunk_logger(logger, "[PLAN] Receiving plans...")
+            )
+        for result, (plan, _) in zip(results, plans):
+            result["plan"] = plan
+        plan_hits = sum(1 for _, usage in plans if usage['input_tokens'] == 0)
+        if plan_hits:
+            logger(f"[CACHE HIT] {plan_hits} of {len(prompts)} plans served from the response cache")
+        logger(f"[PLAN] {len(prompts)} plans completed")
+        
+        # Step 2: Generate all scenes in one request
+        logger(f"[CODE] Generating Manim code for {len(prompts)} plans...")
+        code_gen = ManimCodeGenerator()
+        async with gemini_slots:
+            codes = await asyncio.to_thread(
+                code_gen.generate_codes,
+                [plan for plan, _ in plans],
+                prompts,
+                _first_chunk_logger(logger, "[CODE] Receiving code...")
+            )
+        for result, (_, plan_tokens), (code, class_name, code_tokens) in zip(results, plans, codes):
+            result["code"] = code
+            result["class_name"] = class_name
+            result["source_file"] = str(code_gen.scene_file(class_name))
+            _record_token_usage(result, plan_tokens, code_tokens)
+        code_hits = sum(1 for _, _, usage in codes if usage['input_tokens'] == 0)
+        if code_hits:
+            logger(f"[CACHE HIT] {code_hits} of {len(prompts)} scenes served from the response cache")
+        logger(f"[CODE] Code generated for {len(prompts)} plans")
+        
+        # Step 3: Render all scenes in parallel
+        long_scenes = sum(1 for result in results if _render_as_draft(result["code"], draft) and not draft)
+        if long_scenes:
+            logger(f"[RENDER] {long_scenes} long scenes will be rendered as draft previews")
+        logger(f"[RENDER] Rendering {len(prompts)} animation videos...")
+        renders = await asyncio.to_thread(
+            renderer.render_many,
+            [(result["class_name"], Path(result["source_file"])) for result in results],
+            draft
+        )
+        logger("[RENDER] Rendering completed")
+        for result, (success, video_or_error, logs) in zip(results, renders):
+            _record_render(result, success, video_or_error, logs, logger)
+            
+    except Exception as e:
+        error_msg = f"Error in animation generation pipeline: {str(e)}"
+        for result in results:
+            if not result["success"] and not result["error"]:
+                result["error"] = error_msg
+        logger(f"[ERROR] {error_msg}")
+    
+    return results
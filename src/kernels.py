@@ -0,0 +1,57 @@
+"""
+Point Kernels Module
+
+Batched point transforms for Manim scenes. Each kernel takes a (N, 3) float
+array of points, transforms it in place and returns it, so it can be handed
+straight to Mobject.apply_points_function_about_point.
+
+With numba installed the kernels are compiled loops, cached on disk so the
+compile cost is paid once rather than on every render; without it the NumPy
+versions below are used.
+"""
+
+import math
+import numpy as np
+
+
+def _warp_grid_numpy(points: np.ndarray) -> np.ndarray:
+    """Shift x by sin(y) and y by sin(x)."""
+    points[:, :2] += np.sin(points[:, [1, 0]])
+    return points
+
+
+def _complex_exp_numpy(points: np.ndarray) -> np.ndarray:
+    """Map each point (x, y) to exp(x + iy) in the plane."""
+    w = np.exp(points[:, 0] + 1j * points[:, 1])
+    points[:, 0] = w.real
+    points[:, 1] = w.imag
+    points[:, 2] = 0
+    return points
+
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Optional dependency: fall back to the NumPy kernels
+    warp_grid = _warp_grid_numpy
+    complex_exp = _complex_exp_numpy
+else:
+    @njit(cache=True, fastmath=True, parallel=True)
+    def warp_grid(points):
+        """Shift x by sin(y) and y by sin(x)."""
+        for i in prange(points.shape[0]):
+            x, y = points[i, 0], points[i, 1]
+            points[i, 0] = x + math.sin(y)
+            points[i, 1] = y + math.sin(x)
+        return points
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def complex_exp(points):
+        """Map each point (x, y) to exp(x + iy) in the plane."""
+        for i in prange(points.shape[0]):
+            magnitude = math.exp(points[i, 0])
+            angle = points[i, 1]
+            points[i, 0] = magnitude * math.cos(angle)
+            points[i, 1] = magnitude * math.sin(angle)
+            points[i, 2] = 0.0
+        return points
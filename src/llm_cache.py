@@ -0,0 +1,241 @@
+"""
+LLM Response Cache Module
+
+Persistent on-disk caches for Gemini responses:
+1. LLMCache - exact-match cache keyed by (model name, fully rendered prompt)
+2. SemanticCache - near-duplicate lookup over user prompts using sentence embeddings
+
+Cache hits return in milliseconds instead of seconds and consume no tokens.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+from diskcache import Cache
+
+
+CACHE_DIR = Path(".llm_cache")
+DEFAULT_TTL_SECONDS = 3600
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+SEMANTIC_SIMILARITY_THRESHOLD = 0.92
+
+# How long a lookup waits for the embedding model before using exact matching only
+EMBEDDER_WAIT_SECONDS = 0.5
+
+_EMBEDDER = None
+_EMBEDDER_READY = threading.Event()
+
+_SEMANTIC_CACHE = None
+_SEMANTIC_CACHE_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def _preload_embedder() -> None:
+    """Load and warm up the embedding model; runs in a background thread at import."""
+    global _EMBEDDER
+    try:
+        from sentence_transformers import SentenceTransformer
+        embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        embedder.encode(["warmup"])
+        _EMBEDDER = embedder
+    except Exception:
+        # Not installed or failed to load: semantic matching stays disabled
+        pass
+    finally:
+        _EMBEDDER_READY.set()
+
+
+def get_embedder(timeout: float = EMBEDDER_WAIT_SECONDS):
+    """The sentence-transformers model, or None if it is not installed or still loading."""
+    _EMBEDDER_READY.wait(timeout)
+    return _EMBEDDER
+
+
+class LLMCache:
+    """Exact-match response cache keyed by sha256 of (model name, prompt)."""
+
+    def __init__(self, directory: Path = CACHE_DIR, ttl: int | None = None):
+        if ttl is None:
+            ttl = int(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+
+        self.ttl = ttl
+        self._cache = Cache(str(directory), eviction_policy="least-recently-used")
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        """Build a stable cache key for a model/prompt pair."""
+        payload = json.dumps({"model": model_name, "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, prompt: str) -> tuple[str, dict] | None:
+        """
+        Look up a cached response.
+
+        Returns:
+            Tuple of (response_text, token_usage_dict), or None on a miss
+        """
+        hit = self._cache.get(self.make_key(model_name, prompt))
+        if hit is None:
+            return None
+
+        return hit["text"], hit["usage"]
+
+    def set(self, model_name: str, prompt: str, text: str, usage: dict) -> None:
+        """Store a response together with the token usage it cost."""
+        self._cache.set(
+            self.make_key(model_name, prompt),
+            {"text": text, "usage": usage},
+            expire=self.ttl
+        )
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache that matches paraphrased prompts.
+
+    Vectors are L2-normalized, so a flat inner-product search is a cosine
+    similarity search. The index is a small float32 matrix persisted next to
+    the exact-match cache, together with its entries in one file that is
+    replaced atomically. Disabled when sentence-transformers is not installed.
+
+    Use get_semantic_cache() rather than building instances: writes reload the
+    file first, so entries saved by other processes are merged, not overwritten.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        threshold: float = SEMANTIC_SIMILARITY_THRESHOLD,
+        ttl: int | None = None
+    ):
+        if ttl is None:
+            ttl = int(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index_path = directory / "semantic_index.npz"
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._entries = []
+
+    def _refresh(self) -> None:
+        """Reload the persisted index if it changed since it was last read. Call with the lock held."""
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime == self._loaded_mtime:
+            return
+
+        self._loaded_mtime = mtime
+        self._vectors, self._entries = np.empty((0, 0), dtype=np.float32), []
+        if mtime is None:
+            return
+
+        try:
+            with np.load(self.index_path) as stored:
+                vectors = stored["vectors"]
+                entries = json.loads(str(stored["entries"]))
+        except Exception as e:
+            logger.warning("Ignoring unreadable semantic cache index %s: %s", self.index_path, e)
+            return
+
+        if len(vectors) == len(entries):
+            self._vectors, self._entries = vectors, entries
+        else:
+            logger.warning("Ignoring semantic cache index %s: vectors and entries disagree", self.index_path)
+
+    def _save(self) -> None:
+        """Write the index to a temporary file and swap it in. Call with the lock held."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.index_path.parent, suffix=".tmp", delete=False) as f:
+            np.savez(f, vectors=self._vectors, entries=np.array(json.dumps(self._entries)))
+        os.replace(f.name, self.index_path)
+        self._loaded_mtime = self.index_path.stat().st_mtime_ns
+
+    def embed(self, text: str) -> np.ndarray | None:
+        """Embed text as a normalized float32 vector, or None when embeddings are unavailable."""
+        embedder = get_embedder()
+        if embedder is None:
+            return None
+
+        return embedder.encode([text], normalize_embeddings=True)[0].astype(np.float32)
+
+    def get(self, namespace: str, vector: np.ndarray | None) -> tuple[str, dict] | None:
+        """
+        Find the most similar live entry within a namespace.
+
+        Returns:
+            Tuple of (response_text, token_usage_dict), or None when nothing
+            scores above the similarity threshold
+        """
+        if vector is None:
+            return None
+
+        with self._lock:
+            self._refresh()
+            vectors, entries = self._vectors, self._entries
+
+        if not entries:
+            return None
+
+        scores = vectors @ vector
+        oldest_allowed = time.time() - self.ttl
+        for idx in np.argsort(scores)[::-1]:
+            if scores[idx] <= self.threshold:
+                break
+            entry = entries[idx]
+            if entry["namespace"] == namespace and entry["created"] >= oldest_allowed:
+                return entry["text"], entry["usage"]
+
+        return None
+
+    def set(self, namespace: str, vector: np.ndarray | None, text: str, usage: dict) -> None:
+        """Add a response to the index and drop expired entries."""
+        if vector is None:
+            return
+
+        with self._lock:
+            # Start from what is on disk, so entries other writers saved are kept
+            self._refresh()
+
+            oldest_allowed = time.time() - self.ttl
+            live = [
+                i for i, e in enumerate(self._entries)
+                if e["created"] >= oldest_allowed and self._vectors.shape[1] == len(vector)
+            ]
+            vectors = self._vectors[live] if live else np.empty((0, len(vector)), dtype=np.float32)
+
+            # New lists and arrays rather than in-place edits: get() reads them outside the lock
+            entries = [self._entries[i] for i in live]
+            entries.append({
+                "namespace": namespace,
+                "text": text,
+                "usage": usage,
+                "created": time.time(),
+            })
+            self._entries = entries
+            self._vectors = np.vstack([vectors, vector[np.newaxis, :]])
+            self._save()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Return the process-wide semantic cache, creating it on first use."""
+    global _SEMANTIC_CACHE
+    with _SEMANTIC_CACHE_LOCK:
+        if _SEMANTIC_CACHE is None:
+            _SEMANTIC_CACHE = SemanticCache()
+        return _SEMANTIC_CACHE
+
+
+threading.Thread(target=_preload_embedder, daemon=True).start()
@@ -1,7 +1,18 @@
-from manim import *
+import numpy as np
+from manim import (
+    BLUE, DOWN, LEFT, ORIGIN, PINK, RIGHT, TAU, UP, YELLOW,
+    Circle, Create, DecimalNumber, FadeIn, FadeOut, LaggedStart, LineJointType,
+    MathTex, NumberPlane, Polygon, Scene, SpiralIn, Square, Tex, Transform,
+    Triangle, VGroup, Write, config, there_and_back,
+)
+from kernels import complex_exp, warp_grid
 
 #!/usr/bin/env python
 
+# Vertices of the unit regular pentagon, computed once per process
+_PENTAGON_ANGLES = np.linspace(0, 2 * np.pi, 5, endpoint=False)
+_PENTAGON_VERTS = np.column_stack((np.cos(_PENTAGON_ANGLES), np.sin(_PENTAGON_ANGLES), np.zeros(5)))
+
 class MinimalExample(Scene):
     def construct(self):
         # Tex
@@ -47,12 +58,8 @@ class MinimalExample(Scene):
         # prepare_for_nonlinear_transform
         grid.prepare_for_nonlinear_transform()
         
-        # animate.apply_function
-        self.play(
-            grid.animate.apply_function(
-                lambda p: p + np.array([np.sin(p[1]), np.sin(p[0]), 0])
-            )
-        )
+        # animate.apply_points_function_about_point, warping all points in one kernel call
+        self.play(grid.animate.apply_points_function_about_point(warp_grid, about_point=ORIGIN))
         
         # Circle
         circle = Circle()
@@ -72,13 +79,8 @@ class MinimalExample(Scene):
         self.play(Create(square))
         self.play(Transform(square, circle))
         
-        # ApplyPointwiseFunction
-        self.play(
-            ApplyPointwiseFunction(
-                lambda point: complex_to_R3(np.exp(R3_to_complex(point))),
-                square,
-            )
-        )
+        # Complex exponential of all points at once, instead of ApplyPointwiseFunction per point
+        self.play(square.animate.apply_points_function_about_point(complex_exp, about_point=ORIGIN))
         
         # tex_to_color_map
         colored = Tex("Text", tex_to_color_map={"Text": YELLOW})
@@ -90,9 +92,10 @@ class MinimalExample(Scene):
         # to_edge
         square.to_edge(UP)
         
-        # add_updater
-        decimal.add_updater(lambda d: d.next_to(square, RIGHT))
-        decimal.add_updater(lambda d: d.set_value(square.get_center()[1]))
+        # add_updater; square, RIGHT and the bound get_center are default arguments so
+        # the per-frame calls read locals instead of closure cells and globals
+        decimal.add_updater(lambda d, sq=square, right=RIGHT: d.next_to(sq, right))
+        decimal.add_updater(lambda d, center=square.get_center: d.set_value(center()[1]))
         
         self.add(decimal)
         
@@ -112,9 +115,7 @@ class MinimalExample(Scene):
         triangle = Triangle()
         
         # Polygon
-        pentagon = Polygon(
-            *[[np.cos(2 * np.pi / 5 * i), np.sin(2 * np.pi / 5 * i), 0] for i in range(5)]
-        )
+        pentagon = Polygon(*_PENTAGON_VERTS)
         
         shapes = VGroup(triangle, pentagon, pi)
         
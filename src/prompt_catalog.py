@@ -0,0 +1,129 @@
+"""
+Prompt Catalog Module
+
+Ready-made plans and scene code for canonical prompts, shipped in
+prompts/catalog.jsonl. A prompt that matches a catalog entry skips both Gemini
+calls and goes straight to rendering.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+from llm_cache import CACHE_DIR, get_embedder
+
+
+CATALOG_PATH = Path("prompts/catalog.jsonl")
+CATALOG_EMBEDDINGS_PATH = CACHE_DIR / "catalog_embeddings.npz"
+CATALOG_MATCH_THRESHOLD = 0.95
+
+_WORD = re.compile(r'\w+')
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    """Lowercase text and reduce it to its words, for exact matching."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class PromptCatalog:
+    """
+    Matches user prompts against the catalog.
+
+    Prompts that are equal up to case, punctuation and whitespace always match.
+    When sentence-transformers is installed, prompts whose embedding has cosine
+    similarity above the threshold with a catalog prompt match as well.
+    """
+
+    def __init__(
+        self,
+        path: Path = CATALOG_PATH,
+        embeddings_path: Path = CATALOG_EMBEDDINGS_PATH,
+        threshold: float = CATALOG_MATCH_THRESHOLD
+    ):
+        self.threshold = threshold
+        self.embeddings_path = embeddings_path
+        self.entries = []
+        self._digest = ""
+        self._vectors = None
+        self._vectors_lock = threading.Lock()
+
+        if path.exists():
+            raw = path.read_text(encoding="utf-8")
+            self.entries = [json.loads(line) for line in raw.splitlines() if line.strip()]
+            self._digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+        self._by_normalized_prompt = {_normalize(e["prompt"]): e for e in self.entries}
+
+    def match(self, user_prompt: str) -> dict | None:
+        """
+        Find the catalog entry for a prompt.
+
+        Returns:
+            Entry dictionary with keys prompt, plan, code, or None when nothing matches
+        """
+        entry = self._by_normalized_prompt.get(_normalize(user_prompt))
+        if entry is not None or not self.entries:
+            return entry
+
+        embedder = get_embedder()
+        if embedder is None:
+            return None
+
+        query = embedder.encode([user_prompt], normalize_embeddings=True)[0]
+        scores = self._get_vectors(embedder) @ query
+        best = int(np.argmax(scores))
+
+        return self.entries[best] if scores[best] > self.threshold else None
+
+    def _get_vectors(self, embedder) -> np.ndarray:
+        """Catalog prompt embeddings, computed once and stored next to the LLM cache."""
+        with self._vectors_lock:
+            if self._vectors is None:
+                self._vectors = self._load_vectors()
+            if self._vectors is None:
+                self._vectors = embedder.encode(
+                    [entry["prompt"] for entry in self.entries],
+                    normalize_embeddings=True
+                ).astype(np.float32)
+                self._save_vectors()
+            return self._vectors
+
+    def _load_vectors(self) -> np.ndarray | None:
+        """Stored embeddings, or None if missing, unreadable or made for another catalog."""
+        if not self.embeddings_path.exists():
+            return None
+
+        try:
+            with np.load(self.embeddings_path) as stored:
+                if str(stored["digest"]) == self._digest:
+                    return stored["vectors"]
+        except Exception as e:
+            logger.warning("Ignoring unreadable catalog embeddings %s: %s", self.embeddings_path, e)
+
+        return None
+
+    def _save_vectors(self) -> None:
+        """Write the embeddings to a temporary file and swap it in."""
+        self.embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.embeddings_path.parent, suffix=".tmp", delete=False) as f:
+            np.savez(f, digest=self._digest, vectors=self._vectors)
+        os.replace(f.name, self.embeddings_path)
+
+
+def get_prompt_catalog() -> PromptCatalog:
+    """Return the process-wide catalog, loading it on first use."""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = PromptCatalog()
+        return _CATALOG
@@ -0,0 +1,225 @@
+"""
+Render Worker Module
+
+A long-lived Python process with Manim already imported. Starting the Manim CLI
+costs a fresh interpreter plus the manim/numpy/cairo imports on every render;
+the worker pays that once and then renders scenes on request.
+
+Protocol: one JSON request per line on stdin, one JSON reply per line on the
+worker's original stdout. Everything Manim prints is redirected to stderr, which
+the client reads as the render log.
+"""
+
+import os
+import sys
+import json
+import queue
+import threading
+import traceback
+import subprocess
+import importlib.util
+from pathlib import Path
+from collections import deque
+
+
+# Memory Manim may hold in frames waiting to be encoded (PROMPT_MANIM_WRITE_BUFFER_MB)
+DEFAULT_WRITE_BUFFER_MB = 64
+
+_WORKERS: list["RenderWorker"] = []
+_WORKERS_LOCK = threading.Lock()
+
+
+class RenderWorker:
+    """Client side of the render worker: starts the process and sends it scenes."""
+
+    def __init__(self, max_log_lines: int = 2000):
+        self.max_log_lines = max_log_lines
+        self._process = None
+        self._events = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker process if it is not already running."""
+        if self._process is not None and self._process.poll() is None:
+            return
+
+        self._process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        events = self._events = queue.Queue()
+
+        # Each process's readers keep the queue they started with, so readers of a
+        # stopped process cannot post its exit into a restarted worker's queue
+        def forward(stream, kind, events):
+            for line in stream:
+                events.put((kind, line))
+            events.put(("exit", None))
+
+        threading.Thread(target=forward, args=(self._process.stdout, "reply", events), daemon=True).start()
+        threading.Thread(target=forward, args=(self._process.stderr, "log", events), daemon=True).start()
+
+    def stop(self) -> None:
+        """Kill the worker process; the next render starts a fresh one."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def render(
+        self,
+        source_file: Path,
+        class_name: str,
+        options: dict,
+        idle_timeout: float
+    ) -> tuple[bool, str, str] | None:
+        """
+        Render one scene in the worker.
+
+        Args:
+            source_file: Python file that defines the scene
+            class_name: Name of the Manim Scene class to render
+            options: Manim config overrides (e.g. quality, pixel_height)
+            idle_timeout: Seconds without output or reply before the worker is killed
+
+        Returns:
+            Tuple of (success: bool, video_path_or_error: str, output_log: str),
+            or None if the worker could not be used and the caller should fall back
+            to the Manim CLI
+        """
+        with self._lock:
+            try:
+                self.start()
+                request = {"file": str(source_file), "scene": class_name, "options": options}
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                self.stop()
+                return None
+
+            output_lines = deque(maxlen=self.max_log_lines)
+            while True:
+                try:
+                    kind, payload = self._events.get(timeout=idle_timeout)
+                except queue.Empty:
+                    self.stop()
+                    return (
+                        False,
+                        f"Rendering stalled (no output for {idle_timeout} seconds)",
+                        "".join(output_lines)
+                    )
+
+                if kind == "log":
+                    output_lines.append(payload)
+                elif kind == "reply":
+                    break
+                else:
+                    # The worker died (e.g. Manim is not importable); let the CLI handle it
+                    self.stop()
+                    return None
+
+            reply = json.loads(payload)
+            output_log = "".join(output_lines)
+            if reply["ok"]:
+                return True, reply["video_path"], output_log
+            return False, f"Rendering failed: {reply['error']}", output_log
+
+
+def get_render_worker() -> RenderWorker:
+    """Return the process-wide render worker."""
+    return get_render_workers(1)[0]
+
+
+def get_render_workers(count: int) -> list[RenderWorker]:
+    """
+    Return count process-wide render workers, creating them as needed.
+
+    The first one is the worker returned by get_render_worker. Workers are not
+    started here; each starts on its first render (or an explicit start()).
+    """
+    with _WORKERS_LOCK:
+        while len(_WORKERS) < count:
+            _WORKERS.append(RenderWorker())
+        return _WORKERS[:count]
+
+
+def _render_scene(source_file: str, class_name: str, options: dict) -> str:
+    """Load a scene file as a fresh module and render one of its classes."""
+    from manim import tempconfig
+
+    # A new module object per render, never registered in sys.modules, so no state
+    # from earlier scenes (or earlier versions of this file) can leak into this one.
+    # It is executed inside tempconfig, so module-level config changes such as
+    # config.background_color = ... are undone when the render ends.
+    with tempconfig({"input_file": source_file, **options}):
+        spec = importlib.util.spec_from_file_location(Path(source_file).stem, source_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        scene_class = getattr(module, class_name)
+
+        scene = scene_class()
+        scene.render()
+        return str(scene.renderer.file_writer.movie_file_path)
+
+
+def _bound_frame_queue() -> None:
+    """
+    Cap the frame queue between Manim's render loop and its encoder thread.
+    
+    Manim hands each frame to a writer thread through an unbounded queue, so a
+    slow disk or encoder lets frames pile up without limit. Replacing the queue
+    class it creates with a bounded one keeps at most PROMPT_MANIM_WRITE_BUFFER_MB
+    of frames in flight; past that, rendering waits for the encoder and no frames
+    are dropped.
+    """
+    from manim import config
+    from manim.scene import scene_file_writer
+    
+    limit = int(os.getenv("PROMPT_MANIM_WRITE_BUFFER_MB", DEFAULT_WRITE_BUFFER_MB)) * 2**20
+    
+    def bounded_queue():
+        frame_bytes = config.pixel_width * config.pixel_height * 4  # RGBA
+        return queue.Queue(maxsize=max(1, limit // frame_bytes))
+    
+    scene_file_writer.Queue = bounded_queue
+
+
+def _warm_up_text() -> None:
+    """
+    Lay out a short Text once, so the first scene does not pay for Pango's font
+    discovery. Runs while Gemini is still planning; failures only lose the head start.
+    """
+    try:
+        from manim import Text
+        Text("warm up")
+    except Exception:
+        traceback.print_exc()
+
+
+def serve() -> None:
+    """Answer render requests from stdin until it is closed."""
+    # Keep the original stdout for replies and send everything else to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    import manim  # noqa: F401 - the import is the expensive part we want done up front
+    _bound_frame_queue()
+    _warm_up_text()
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            video_path = _render_scene(request["file"], request["scene"], request["options"])
+            reply = {"ok": True, "video_path": video_path}
+        except Exception:
+            reply = {"ok": False, "error": traceback.format_exc()}
+        sys.stdout.flush()
+        replies.write(json.dumps(reply) + "\n")
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,182 @@
+"""
+Scene Templates Module
+
+Parameterized Manim scenes for common prompt shapes, shipped in
+prompts/scene_templates/. Where the prompt catalog only serves exact prompts,
+a template is filled in from the prompt itself ("Riemann sum of x^2 from 0 to 3
+with 6 rectangles"), so whole families of prompts skip both Gemini calls.
+
+Each template in index.json has a regular expression whose named groups are its
+slots: func/func_to (a function of x), a/b (interval bounds) and n (rectangle
+count). Slot values are validated before they reach the scene code; a prompt
+whose values do not validate simply falls through to Gemini.
+"""
+
+import re
+import ast
+import json
+import threading
+from pathlib import Path
+from string import Template
+import numpy as np
+
+
+SCENE_TEMPLATES_DIR = Path("prompts/scene_templates")
+MAX_RECTANGLES = 50
+
+# Names allowed in user-supplied expressions, and the code they become
+_FUNCTIONS = {
+    "sin": "np.sin", "cos": "np.cos", "tan": "np.tan", "exp": "np.exp",
+    "log": "np.log", "ln": "np.log", "sqrt": "np.sqrt", "abs": "np.abs",
+}
+_CONSTANTS = {"pi": "np.pi", "e": "np.e"}
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+_BARE_CALL = re.compile(r'\b(sin|cos|tan|exp|log|ln|sqrt|abs)\s+x\b')
+_IMPLICIT_PRODUCT = re.compile(r'(\d|\))\s*(?=[a-z(])')
+
+_BANK = None
+_BANK_LOCK = threading.Lock()
+
+
+class _ToNumpy(ast.NodeTransformer):
+    """Map allowed names to NumPy and make numbers floats (no huge integer powers)."""
+
+    def visit_Name(self, node):
+        code = _FUNCTIONS.get(node.id) or _CONSTANTS.get(node.id)
+        return ast.parse(code, mode="eval").body if code else node
+
+    def visit_Constant(self, node):
+        return ast.Constant(float(node.value))
+
+
+def _to_code(text: str, variables: set[str]) -> str | None:
+    """
+    Turn a math expression as people type it ("2x^2 + sin x") into NumPy code.
+
+    Returns:
+        Python expression string, or None if the text is not a plain expression
+        over the given variables, the allowed functions and constants
+    """
+    text = text.strip().lower().replace("^", "**").replace("²", "**2").replace("³", "**3")
+    text = _BARE_CALL.sub(r'\1(x)', text)
+    text = _IMPLICIT_PRODUCT.sub(r'\1*', text)
+
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError:
+        return None
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if not (
+                isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                and len(node.args) == 1 and not node.keywords
+            ):
+                return None
+        elif isinstance(node, ast.Name):
+            if node.id not in variables and node.id not in _FUNCTIONS and node.id not in _CONSTANTS:
+                return None
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                return None
+        elif not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load, *_OPERATORS)):
+            return None
+
+    return ast.unparse(_ToNumpy().visit(tree))
+
+
+def _uses_variable(code: str, name: str) -> bool:
+    """Whether an expression produced by _to_code refers to the given variable."""
+    tree = ast.parse(code, mode="eval")
+    return any(isinstance(node, ast.Name) and node.id == name for node in ast.walk(tree))
+
+
+def _to_number(text: str) -> float | None:
+    """Evaluate a constant expression such as "-2pi" or "3/2"; None if it is not one."""
+    code = _to_code(text, set())
+    if code is None:
+        return None
+
+    try:
+        value = float(eval(code, {"__builtins__": {}, "np": np}))
+    except (ArithmeticError, ValueError):
+        return None
+
+    return value if np.isfinite(value) else None
+
+
+class SceneTemplateBank:
+    """Matches user prompts against the scene templates and fills them in."""
+
+    def __init__(self, directory: Path = SCENE_TEMPLATES_DIR):
+        self.templates = []
+
+        index_path = directory / "index.json"
+        if index_path.exists():
+            for spec in json.loads(index_path.read_text(encoding="utf-8")):
+                self.templates.append({
+                    **spec,
+                    "pattern": re.compile(spec["pattern"], re.IGNORECASE),
+                    "code": Template((directory / spec["file"]).read_text(encoding="utf-8")),
+                })
+
+    def fill(self, user_prompt: str) -> dict | None:
+        """
+        Find a template for a prompt and fill it in.
+
+        Returns:
+            Dictionary with keys name, plan, code, or None when no template fits
+        """
+        prompt = user_prompt.strip().rstrip(".!?")
+        for template in self.templates:
+            match = template["pattern"].fullmatch(prompt)
+            if match is not None:
+                filled = self._fill_slots(template, match)
+                if filled is not None:
+                    return filled
+
+        return None
+
+    def _fill_slots(self, template: dict, match: re.Match) -> dict | None:
+        """Validate a match's slot values and render the template's plan and code."""
+        text = dict(template.get("defaults", {}))
+        text.update({slot: value.strip() for slot, value in match.groupdict().items() if value})
+
+        code = {}
+        for slot in ("func", "func_to"):
+            if slot in text:
+                code[slot] = _to_code(text[slot], {"x"})
+                # A constant such as "pi" in "show pi" is not a function to plot
+                if code[slot] is None or not _uses_variable(code[slot], "x"):
+                    return None
+
+        if "a" in text and "b" in text:
+            a, b = _to_number(text["a"]), _to_number(text["b"])
+            if a is None or b is None or a >= b:
+                return None
+            code["a"], code["b"] = repr(a), repr(b)
+
+        if "n" in text:
+            code["n"] = str(min(max(int(text["n"]), 1), MAX_RECTANGLES))
+            text["n"] = code["n"]
+
+        for slot in ("label", "label_to"):
+            if slot in template:
+                text[slot] = Template(template[slot]).safe_substitute(text)
+                code[slot] = repr(text[slot])
+
+        return {
+            "name": template["name"],
+            "plan": Template(template["plan"]).safe_substitute(text),
+            "code": template["code"].substitute(code),
+        }
+
+
+def get_scene_template_bank() -> SceneTemplateBank:
+    """Return the process-wide template bank, loading it on first use."""
+    global _BANK
+    with _BANK_LOCK:
+        if _BANK is None:
+            _BANK = SceneTemplateBank()
+        return _BANK
@@ -0,0 +1,66 @@
+"""
+Tests for the render worker
+
+The worker renders many scenes in one process, so a scene must not be able to
+leave Manim's global config changed for the scenes after it. Skipped when Manim
+is not installed.
+"""
+
+import sys
+import tempfile
+import unittest
+import importlib.util
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from render_worker import _render_scene
+
+RECOLORED_SCENE = """
+from manim import *
+
+config.background_color = RED
+config.frame_width = 20
+
+class RecoloredScene(Scene):
+    def construct(self):
+        self.add(Square())
+        self.wait(0.1)
+"""
+
+PLAIN_SCENE = """
+from manim import *
+
+class PlainScene(Scene):
+    def construct(self):
+        self.add(Circle())
+        self.wait(0.1)
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec("manim"), "Manim is not installed")
+class RenderSceneConfigTest(unittest.TestCase):
+    def test_module_level_config_changes_do_not_leak(self):
+        from manim import config
+
+        background_color = config.background_color
+        frame_width = config.frame_width
+
+        with tempfile.TemporaryDirectory() as directory:
+            options = {"quality": "low_quality", "media_dir": directory, "disable_caching": True}
+            scenes = [("recolored.py", RECOLORED_SCENE, "RecoloredScene"), ("plain.py", PLAIN_SCENE, "PlainScene")]
+
+            for file_name, code, class_name in scenes:
+                source_file = Path(directory) / file_name
+                source_file.write_text(code, encoding="utf-8")
+
+                video_path = _render_scene(str(source_file), class_name, options)
+
+                self.assertTrue(Path(video_path).exists())
+                self.assertEqual(config.background_color, background_color)
+                self.assertEqual(config.frame_width, frame_width)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for scene template slot filling
+
+Expressions typed into prompts end up as code in the generated scene, so the
+conversion must only ever produce plain arithmetic over x.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from scene_templates import SceneTemplateBank, _to_code, _to_number
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "prompts" / "scene_templates"
+
+
+class ToCodeTest(unittest.TestCase):
+    def test_converts_typed_math_to_numpy(self):
+        self.assertEqual(_to_code("x^2", {"x"}), "x ** 2.0")
+        self.assertEqual(_to_code("2x²", {"x"}), "2.0 * x ** 2.0")
+        self.assertEqual(_to_code("sin x + cos(x)", {"x"}), "np.sin(x) + np.cos(x)")
+        self.assertEqual(_to_code("ln(x) - pi", {"x"}), "np.log(x) - np.pi")
+
+    def test_rejects_names_outside_the_whitelist(self):
+        for text in ("y + 1", "__import__", "os", "np", "exit"):
+            self.assertIsNone(_to_code(text, {"x"}), text)
+
+    def test_rejects_calls_other_than_whitelisted_functions(self):
+        for text in ("__import__('os')", "eval(x)", "sin(x, x)", "sin(x=1)", "x(1)(2)"):
+            self.assertIsNone(_to_code(text, {"x"}), text)
+
+    def test_rejects_attributes_subscripts_and_other_syntax(self):
+        for text in (
+            "x.real", "np.sin(x)", "x[0]", "[x]", "lambda: x", "x if x else 1",
+            "x < 1", "x and 1", "'x'", "True", "x; x", "x = 1", "x // 2", "x % 2",
+        ):
+            self.assertIsNone(_to_code(text, {"x"}), text)
+
+    def test_variables_are_limited_to_the_given_set(self):
+        self.assertIsNone(_to_code("x + 1", set()))
+
+    def test_to_number(self):
+        self.assertEqual(_to_number("3/2"), 1.5)
+        self.assertAlmostEqual(_to_number("-2pi"), -6.283185307179586)
+        self.assertIsNone(_to_number("x"))
+        self.assertIsNone(_to_number("1/0"))
+
+
+class SceneTemplateBankTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = SceneTemplateBank(TEMPLATES_DIR)
+
+    def test_fills_function_plot(self):
+        filled = self.bank.fill("Plot f(x) = x^2 from -2 to 2")
+        self.assertEqual(filled["name"], "function_plot")
+        self.assertIn("return x ** 2.0", filled["code"])
+        self.assertIn("a, b = -2.0, 2.0", filled["code"])
+
+    def test_fills_riemann_sum_with_clamped_count(self):
+        filled = self.bank.fill("Riemann sum of sin x from 0 to pi with 500 rectangles")
+        self.assertEqual(filled["name"], "riemann_sum")
+        self.assertIn("n = 0.0, 3.141592653589793, 50", filled["code"])
+
+    def test_constants_are_not_functions(self):
+        for prompt in ("Show pi", "Animate e", "Graph 2", "Transform x^2 into 3"):
+            self.assertIsNone(self.bank.fill(prompt), prompt)
+
+    def test_unsafe_expressions_fall_through(self):
+        self.assertIsNone(self.bank.fill("Plot __import__('os').system('ls')"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,12 +6,100 @@ A simple interface for generating Manim animations from natural language prompts
 
 import streamlit as st
 import sys
+import time
+import atexit
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Add src directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from animation_generator import generate_animation
+from animation_generator import AnimationRenderer, generate_animation, preload_prompt_templates
+
+# Generations running at once across all sessions, and how often a session checks on its own
+GENERATION_WORKERS = 2
+GENERATION_POLL_SECONDS = 0.5
+
+# Progress shown for the pipeline's log tags while a generation runs
+GENERATION_PHASES = {
+    "[PLAN]": (0.1, "Planning the animation..."),
+    "[CATALOG]": (0.4, "Using a ready-made scene..."),
+    "[TEMPLATE]": (0.4, "Using a ready-made scene..."),
+    "[CODE]": (0.4, "Writing Manim code..."),
+    "[RENDER]": (0.7, "Rendering the video...")
+}
+
+# Sidebar example prompts and their button keys
+EXAMPLES = (
+    "Create a blue circle that fades in and transforms into a red square",
+    "Show the Pythagorean theorem: a² + b² = c²",
+    "Animate a sine wave moving across the screen",
+    "Draw a coordinate plane and plot the function f(x) = x²",
+    "Show the number π appearing and rotating while changing colors"
+)
+EXAMPLE_KEYS = tuple(f"example_{example[:20]}" for example in EXAMPLES)
+
+
+@st.cache_resource
+def warm_up_pipeline():
+    """Load the prompt templates and start the Manim render worker once per server."""
+    preload_prompt_templates()
+    AnimationRenderer().warm_up()
+
+
+@st.cache_resource
+def get_generation_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool that runs generate_animation off the script thread, shared by all sessions.
+    
+    On shutdown, queued generations are dropped and running ones are not waited for;
+    their scene files and videos are still written, only the result is lost.
+    """
+    executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix="generate")
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+
+class GenerationFailed(Exception):
+    """Carries a failed result out of generate_animation_cached, so it is not cached."""
+    
+    def __init__(self, result: dict):
+        super().__init__(result["error"])
+        self.result = result
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def generate_animation_cached(prompt: str, draft: bool, _logger) -> dict:
+    """generate_animation memoized per (prompt, draft); only successful results are kept."""
+    result = generate_animation(prompt, logger=_logger, draft=draft)
+    if not result["success"]:
+        raise GenerationFailed(result)
+    return result
+
+
+def run_generation(prompt: str, draft: bool, logs: list[str]) -> dict:
+    """Generate an animation, reusing an earlier result for the same prompt if its video still exists."""
+    try:
+        result = generate_animation_cached(prompt, draft, logs.append)
+        if not Path(result["video_path"]).exists():
+            # The video was removed since the result was cached; make it again
+            generate_animation_cached.clear(prompt, draft, logs.append)
+            result = generate_animation_cached(prompt, draft, logs.append)
+    except GenerationFailed as e:
+        return e.result
+    
+    if not logs:
+        logs.append("[CACHE HIT] Reusing the animation generated earlier for this prompt")
+    return result
+
+
+def generation_progress(logs: list[str]) -> tuple[float, str]:
+    """Progress fraction and status text for the latest phase in a generation's log."""
+    for message in reversed(logs):
+        for tag, progress in GENERATION_PHASES.items():
+            if message.startswith(tag):
+                return progress
+    return 0.0, "Starting..."
 
 
 # Page configuration
@@ -21,6 +109,8 @@ st.set_page_config(
     layout="wide"
 )
 
+warm_up_pipeline()
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -71,22 +161,18 @@ with st.sidebar:
     
     st.header("✨ Example Prompts")
     
-    examples = [
-        "Create a blue circle that fades in and transforms into a red square",
-        "Show the Pythagorean theorem: a² + b² = c²",
-        "Animate a sine wave moving across the screen",
-        "Draw a coordinate plane and plot the function f(x) = x²",
-        "Show the number π appearing and rotating while changing colors"
-    ]
-    
-    for example in examples:
-        if st.button(example, key=f"example_{example[:20]}", use_container_width=True):
+    for example, key in zip(EXAMPLES, EXAMPLE_KEYS):
+        if st.button(example, key=key, use_container_width=True):
             st.session_state.prompt = example
     
     st.divider()
     
     st.header("⚙️ Settings")
-    st.caption("Quality: Low (for speed)")
+    draft = st.checkbox(
+        "Draft preview",
+        help="Render at 240p and 10 fps for a much faster first look"
+    )
+    st.caption("Quality: Draft (240p, 10 fps)" if draft else "Quality: Low (for speed)")
     st.caption("Model: Gemini Pro")
 
 # Main content area
@@ -110,156 +196,169 @@ col1, col2, col3 = st.columns([1, 1, 1])
 with col2:
     generate_button = st.button("🎬 Generate Animation", type="primary", use_container_width=True)
 
-# Generation logic
+# Generation logic: the pipeline runs on the shared executor, and the script
+# reruns every GENERATION_POLL_SECONDS to show its progress until it finishes
 if generate_button:
     if not prompt:
         st.error("⚠️ Please enter a description of your animation!")
     else:
-        # Log display area
-        log_container = st.empty()
+        # The logger runs on the worker thread, so it only collects messages
         logs = []
+        st.session_state.generation = {
+            "future": get_generation_executor().submit(run_generation, prompt, draft, logs),
+            "logs": logs
+        }
+
+generation = st.session_state.get("generation")
+if generation is not None:
+    # Log display area
+    log_container = st.empty()
+    log_container.text("\n".join(generation["logs"]))
+    
+    if not generation["future"].done():
+        fraction, status = generation_progress(list(generation["logs"]))
+        st.progress(fraction, text=status)
+        time.sleep(GENERATION_POLL_SECONDS)
+        st.rerun()
+    
+    result = generation["future"].result()
+    
+    if result["success"]:
+        # Success message
+        st.markdown('<div class="success-box">✅ <b>Animation generated successfully!</b></div>', unsafe_allow_html=True)
         
-        def custom_logger(message):
-            """Custom logger that displays messages in Streamlit UI"""
-            logs.append(message)
-            log_container.text("\n".join(logs))
+        # Display results in tabs
+        tab1, tab2, tab3, tab4 = st.tabs(["🎥 Video", "📋 Plan", "💻 Code", "📊 Token Usage"])
         
-        # Generate animation with custom logger
-        with st.spinner("Generating animation..."):
-            result = generate_animation(prompt, logger=custom_logger)
+        with tab1:
+            st.subheader("Generated Animation")
+            
+            video_path = Path(result["video_path"])
+            if video_path.exists():
+                # Read the video once; the player and the download button share
+                # the same bytes object in Streamlit's media store
+                video_bytes = video_path.read_bytes()
+                st.video(video_bytes, format="video/mp4")
+                
+                # Download button
+                st.download_button(
+                    label="⬇️ Download Video",
+                    data=video_bytes,
+                    file_name=f"animation_{result['class_name']}.mp4",
+                    mime="video/mp4"
+                )
+            else:
+                st.error("Video file not found")
         
-        # Keep final logs visible
-        log_container.text("\n".join(logs))
+        with tab2:
+            st.subheader("Animation Plan")
+            st.text(result["plan"])
         
-        if result["success"]:
-            # Success message
-            st.markdown('<div class="success-box">✅ <b>Animation generated successfully!</b></div>', unsafe_allow_html=True)
+        with tab3:
+            st.subheader("Generated Manim Code")
+            st.caption(f"Saved to `{result['source_file']}`")
+            st.code(result["code"], language="python")
             
-            # Display results in tabs
-            tab1, tab2, tab3, tab4 = st.tabs(["🎥 Video", "📋 Plan", "💻 Code", "📊 Token Usage"])
+            # Show logs in expander
+            if result.get("logs"):
+                with st.expander("📊 Rendering Logs"):
+                    st.text(result["logs"])
+        
+        with tab4:
+            st.subheader("Token Usage & Cost")
             
-            with tab1:
-                st.subheader("Generated Animation")
-                
-                video_path = Path(result["video_path"])
-                if video_path.exists():
-                    st.video(str(video_path))
-                    
-                    # Download button
-                    with open(video_path, "rb") as f:
-                        st.download_button(
-                            label="⬇️ Download Video",
-                            data=f,
-                            file_name=f"animation_{result['class_name']}.mp4",
-                            mime="video/mp4"
-                        )
-                else:
-                    st.error("Video file not found")
+            token_data = result.get("token_usage", {})
             
-            with tab2:
-                st.subheader("Animation Plan")
-                st.text(result["plan"])
+            # Overview metrics in columns
+            col1, col2, col3 = st.columns(3)
             
-            with tab3:
-                st.subheader("Generated Manim Code")
-                st.code(result["code"], language="python")
-                
-                # Show logs in expander
-                if result.get("logs"):
-                    with st.expander("📊 Rendering Logs"):
-                        st.text(result["logs"])
+            with col1:
+                st.metric(
+                    label="Total Input Tokens",
+                    value=f"{token_data.get('total_input_tokens', 0):,}"
+                )
             
-            with tab4:
-                st.subheader("Token Usage & Cost")
-                
-                token_data = result.get("token_usage", {})
-                
-                # Overview metrics in columns
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        label="Total Input Tokens",
-                        value=f"{token_data.get('total_input_tokens', 0):,}"
-                    )
-                
-                with col2:
-                    st.metric(
-                        label="Total Output Tokens",
-                        value=f"{token_data.get('total_output_tokens', 0):,}"
-                    )
-                
-                with col3:
-                    total_cost = token_data.get('total_cost_usd', 0)
-                    st.metric(
-                        label="Total Cost",
-                        value=f"${total_cost:.6f} USD"
-                    )
-                
-                st.divider()
-                
-                # Detailed breakdown
-                st.subheader("Detailed Breakdown")
-                
-                # Planning step
-                st.write("**Step 1: Animation Planning**")
-                plan_col1, plan_col2 = st.columns(2)
-                with plan_col1:
-                    st.write(f"- Input tokens: **{token_data.get('plan_input_tokens', 0):,}**")
-                with plan_col2:
-                    st.write(f"- Output tokens: **{token_data.get('plan_output_tokens', 0):,}**")
-                
-                # Code generation step
-                st.write("**Step 2: Code Generation**")
-                code_col1, code_col2 = st.columns(2)
-                with code_col1:
-                    st.write(f"- Input tokens: **{token_data.get('code_input_tokens', 0):,}**")
-                with code_col2:
-                    st.write(f"- Output tokens: **{token_data.get('code_output_tokens', 0):,}**")
-                
-                st.divider()
-                
-                # Cost breakdown
-                st.subheader("Cost Breakdown")
-                st.write("**Pricing (Gemini 3 Flash Preview):**")
-                st.write("- Input: $0.50 per 1M tokens")
-                st.write("- Output: $3.00 per 1M tokens")
-                
-                st.write("")
-                st.write("**Your costs:**")
-                input_cost = token_data.get('input_cost_usd', 0)
-                output_cost = token_data.get('output_cost_usd', 0)
-                st.write(f"- Input cost: **${input_cost:.6f}** ({token_data.get('total_input_tokens', 0):,} tokens)")
-                st.write(f"- Output cost: **${output_cost:.6f}** ({token_data.get('total_output_tokens', 0):,} tokens)")
-                st.write(f"- **Total: ${total_cost:.6f}**")
-        
-        else:
-            # Error handling
+            with col2:
+                st.metric(
+                    label="Total Output Tokens",
+                    value=f"{token_data.get('total_output_tokens', 0):,}"
+                )
             
-            error_msg = result.get("error", "Unknown error occurred")
-            st.markdown(f'<div class="error-box">❌ <b>Error:</b> {error_msg}</div>', unsafe_allow_html=True)
+            with col3:
+                total_cost = token_data.get('total_cost_usd', 0)
+                st.metric(
+                    label="Total Cost",
+                    value=f"${total_cost:.6f} USD"
+                )
             
-            # Show what we have so far
-            if result.get("plan"):
-                with st.expander("📋 View Generated Plan"):
-                    st.text(result["plan"])
+            st.divider()
             
-            if result.get("code"):
-                with st.expander("💻 View Generated Code"):
-                    st.code(result["code"], language="python")
+            # Detailed breakdown
+            st.subheader("Detailed Breakdown")
             
-            if result.get("logs"):
-                with st.expander("📊 View Logs"):
-                    st.text(result["logs"])
+            # Planning step
+            st.write("**Step 1: Animation Planning**")
+            plan_col1, plan_col2 = st.columns(2)
+            with plan_col1:
+                st.write(f"- Input tokens: **{token_data.get('plan_input_tokens', 0):,}**")
+            with plan_col2:
+                st.write(f"- Output tokens: **{token_data.get('plan_output_tokens', 0):,}**")
+            
+            # Code generation step
+            st.write("**Step 2: Code Generation**")
+            code_col1, code_col2 = st.columns(2)
+            with code_col1:
+                st.write(f"- Input tokens: **{token_data.get('code_input_tokens', 0):,}**")
+            with code_col2:
+                st.write(f"- Output tokens: **{token_data.get('code_output_tokens', 0):,}**")
             
-            # Helpful suggestions
-            st.info("""
-            **Troubleshooting Tips:**
-            - Make sure your GEMINI_API_KEY is set correctly in .env
-            - Ensure Manim is installed: `pip install manim`
-            - Check that ffmpeg is installed and in your PATH
-            - Try simplifying your prompt
-            """)
+            st.divider()
+            
+            # Cost breakdown
+            st.subheader("Cost Breakdown")
+            st.write("**Pricing (Gemini 3 Flash Preview):**")
+            st.write("- Input: $0.50 per 1M tokens")
+            st.write("- Cached input: $0.05 per 1M tokens")
+            st.write("- Output: $3.00 per 1M tokens")
+            
+            st.write("")
+            st.write("**Your costs:**")
+            input_cost = token_data.get('input_cost_usd', 0)
+            output_cost = token_data.get('output_cost_usd', 0)
+            st.write(
+                f"- Input cost: **${input_cost:.6f}** ({token_data.get('total_input_tokens', 0):,} tokens, "
+                f"{token_data.get('total_cached_tokens', 0):,} from context cache)"
+            )
+            st.write(f"- Output cost: **${output_cost:.6f}** ({token_data.get('total_output_tokens', 0):,} tokens)")
+            st.write(f"- **Total: ${total_cost:.6f}**")
+    
+    else:
+        # Error handling
+        
+        error_msg = result.get("error", "Unknown error occurred")
+        st.markdown(f'<div class="error-box">❌ <b>Error:</b> {error_msg}</div>', unsafe_allow_html=True)
+        
+        # Show what we have so far
+        if result.get("plan"):
+            with st.expander("📋 View Generated Plan"):
+                st.text(result["plan"])
+        
+        if result.get("code"):
+            with st.expander("💻 View Generated Code"):
+                st.code(result["code"], language="python")
+        
+        if result.get("logs"):
+            with st.expander("📊 View Logs"):
+                st.text(result["logs"])
+        
+        # Helpful suggestions
+        st.info("""
+        **Troubleshooting Tips:**
+        - Make sure your GEMINI_API_KEY is set correctly in .env
+        - Ensure Manim is installed: `pip install manim`
+        - Check that ffmpeg is installed and in your PATH
+        - Try simplifying your prompt
+        """)
 
 # Footer
 st.divider()